@@ -0,0 +1,159 @@
+"""
+JSON decode benchmark — time and memory to decode large children listings.
+
+Compares requests' response.json() path (decode text, then json.loads),
+json.loads on raw bytes and orjson, and measures how much memory the
+cached result keeps with and without field projection. The server uses
+orjson when installed and response.json() otherwise.
+
+Usage:
+    python benchmarks/bench_json.py [--children 200,2000,10000] [--runs 20]
+Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from wolai_mcp.server import _slim_block  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+WORDS = "the project notes meeting design plan review api release draft 项目 会议 记录 设计 计划".split()
+TYPES = ["text"] * 6 + ["heading", "bull_list", "todo_list", "code", "page", "quote"]
+
+
+def make_block(rng: random.Random, parent_id: str, number: int) -> dict:
+    """A children-listing entry with the fields the API returns, not just the ones tools use."""
+    block_type = rng.choice(TYPES)
+    content = []
+    for _ in range(rng.randint(1, 4)):
+        content.append({
+            "type": "text",
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(3, 20))),
+            "bold": rng.random() < 0.1,
+            "italic": rng.random() < 0.1,
+            "underline": False,
+            "strikethrough": False,
+            "inline_code": False,
+            "front_color": "default",
+            "back_color": "default",
+        })
+    block = {
+        "id": f"{parent_id}-{number:06d}",
+        "type": block_type,
+        "content": content,
+        "parent_id": parent_id,
+        "parent_type": "page",
+        "page_id": parent_id,
+        "children": {"ids": [], "api_url": None},
+        "version": rng.randint(1, 500),
+        "created_at": 1_700_000_000_000 + number,
+        "created_by": "user-" + "".join(rng.choices("0123456789abcdef", k=12)),
+        "edited_at": 1_700_000_500_000 + number,
+        "edited_by": "user-" + "".join(rng.choices("0123456789abcdef", k=12)),
+        "block_front_color": "default",
+        "block_back_color": "default",
+        "text_alignment": "left",
+        "block_alignment": "left",
+        "url": f"https://www.wolai.com/{parent_id}#{number}",
+    }
+    if block_type == "heading":
+        block["level"] = rng.randint(1, 3)
+    elif block_type == "todo_list":
+        block["checked"] = rng.random() < 0.5
+    elif block_type == "code":
+        block["language"] = "python"
+        block["caption"] = ""
+        block["wrap"] = False
+    return block
+
+
+def payload(rng: random.Random, children: int) -> bytes:
+    body = {
+        "data": [make_block(rng, "page0", number) for number in range(children)],
+        "has_more": False,
+        "next_cursor": None,
+    }
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def decoders() -> dict:
+    found = {
+        "requests_json": lambda raw: json.loads(raw.decode("utf-8")),
+        "stdlib_bytes": json.loads,
+    }
+    if orjson is not None:
+        found["orjson"] = orjson.loads
+    return found
+
+
+def timed(func, raw: bytes, runs: int) -> float:
+    """Median milliseconds over runs."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func(raw)
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def memory(decode, raw: bytes, project: bool) -> dict:
+    """Peak KiB while decoding and KiB kept afterwards (what the cache would hold)."""
+    tracemalloc.start()
+    children = decode(raw)["data"]
+    if project:
+        children = [_slim_block(child) for child in children]
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del children
+    return {"peak_kib": round(peak / 1024, 1), "kept_kib": round(kept / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--children", default="200,2000,10000", help="Comma-separated listing sizes")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=52012)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    codecs = decoders()
+    results = []
+    for size in (int(n) for n in args.children.split(",")):
+        raw = payload(rng, size)
+        row = {"children": size, "payload_kib": round(len(raw) / 1024, 1), "decode_ms": {}, "decode_project_ms": {}}
+        for name, decode in codecs.items():
+            row["decode_ms"][name] = timed(decode, raw, args.runs)
+            row["decode_project_ms"][name] = timed(
+                lambda body: [_slim_block(child) for child in decode(body)["data"]], raw, args.runs
+            )
+        fastest = codecs["orjson" if orjson is not None else "requests_json"]
+        row["memory"] = {
+            "full": memory(codecs["requests_json"], raw, project=False),
+            "projected": memory(fastest, raw, project=True),
+        }
+        row["kept_saved_pct"] = round(
+            100 * (1 - row["memory"]["projected"]["kept_kib"] / row["memory"]["full"]["kept_kib"]), 1
+        )
+        results.append(row)
+
+    print(json.dumps({
+        "python": sys.version.split()[0],
+        "orjson": getattr(orjson, "__version__", None),
+        "runs": args.runs,
+        "results": results,
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
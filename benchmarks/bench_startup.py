@@ -0,0 +1,75 @@
+"""
+Startup benchmark — import cost of the server module, via `python -X importtime`.
+
+Each run starts a fresh interpreter that imports wolai_mcp.server (which
+also registers every tool), so the numbers cover everything that happens
+before `mcp.run()`.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--top 15]
+Prints one JSON object; compare runs with the same interpreter and machine.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+TARGET = "wolai_mcp.server"
+# Modules that should stay off the startup path
+DEFERRED = ("requests", "anyio.to_thread", "wolai_mcp.mirror", "pypinyin", "orjson")
+
+
+def run_once() -> tuple[float, dict]:
+    """Returns (wall-clock ms, {module: cumulative µs}) for one cold import."""
+    env = dict(os.environ, PYTHONPATH=SRC, PYTHONDONTWRITEBYTECODE="")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    wall = (time.perf_counter() - started) * 1000
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return wall, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    run_once()  # warm the bytecode cache so every measured run is comparable
+    walls, samples = [], []
+    for _ in range(args.runs):
+        wall, modules = run_once()
+        walls.append(wall)
+        samples.append(modules)
+
+    names = set().union(*samples)
+    median = {name: statistics.median(sample.get(name, 0) for sample in samples) for name in names}
+    top = sorted((name for name in names if name != TARGET), key=median.get, reverse=True)[:args.top]
+
+    print(json.dumps({
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "wall_ms_median": round(statistics.median(walls), 1),
+        "wall_ms_min": round(min(walls), 1),
+        "import_ms_median": round(median.get(TARGET, 0) / 1000, 1),
+        "top_imports_ms": {name: round(median[name] / 1000, 1) for name in top},
+        "deferred_but_imported": [name for name in DEFERRED if median.get(name)],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
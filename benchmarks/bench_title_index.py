@@ -0,0 +1,105 @@
+"""
+Title index benchmark — build time, memory and query latency on synthetic titles.
+
+Usage:
+    python benchmarks/bench_title_index.py [--titles 100000] [--queries 200]
+Prints one JSON object.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from wolai_mcp.index import TitleIndex  # noqa: E402
+
+# English letter frequencies, so generated words have a realistic n-gram spread
+LETTERS = "etaoinshrdlcumwfgypbvkjxqz"
+LETTER_WEIGHTS = [12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8,
+                  2.4, 2.4, 2.2, 2.0, 2.0, 1.9, 1.5, 1.0, 0.8, 0.2, 0.2, 0.1, 0.1]
+
+
+class Corpus:
+    """Zipf-distributed vocabulary, so n-gram frequencies resemble real titles."""
+
+    def __init__(self, rng: random.Random, words: int = 20_000, chars: int = 3_000):
+        self.rng = rng
+        self.words = ["".join(rng.choices(LETTERS, LETTER_WEIGHTS, k=rng.randint(3, 10))) for _ in range(words)]
+        self.chars = [chr(0x4E00 + rng.randrange(0x5000)) for _ in range(chars)]
+        self.word_weights = list(itertools.accumulate(1 / rank for rank in range(1, words + 1)))
+        self.char_weights = list(itertools.accumulate(1 / rank for rank in range(1, chars + 1)))
+
+    def title(self) -> str:
+        rng = self.rng
+        if rng.random() < 0.3:
+            return "".join(rng.choices(self.chars, cum_weights=self.char_weights, k=rng.randint(2, 10)))
+        words = rng.choices(self.words, cum_weights=self.word_weights, k=rng.randint(1, 6))
+        return " ".join(words).title()
+
+
+def typo(rng: random.Random, text: str) -> str:
+    if len(text) < 4:
+        return text
+    i = rng.randrange(len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=52012)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = Corpus(rng)
+    titles = [corpus.title() for _ in range(args.titles)]
+
+    index = TitleIndex()
+    started = time.perf_counter()
+    for number, title in enumerate(titles):
+        index.add(f"block-{number}", title)
+    build_seconds = time.perf_counter() - started
+
+    # Measured on a second build, since tracing slows allocation down a lot
+    tracemalloc.start()
+    traced = TitleIndex()
+    for number, title in enumerate(titles):
+        traced.add(f"block-{number}", title)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del traced
+
+    queries = []
+    for _ in range(args.queries):
+        title = rng.choice(titles)
+        if rng.random() < 0.5:
+            title = typo(rng, title)
+        queries.append(" ".join(title.split()[:2]) if title.isascii() else title[:3])
+
+    latencies = []
+    hits = 0
+    for query in queries:
+        started = time.perf_counter()
+        hits += len(index.search(query, limit=10))
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+
+    print(json.dumps({
+        "titles": args.titles,
+        "build_seconds": round(build_seconds, 3),
+        "index_mb": round(memory / 2**20, 1),
+        "queries": len(queries),
+        "hits_per_query": round(hits / len(queries), 2),
+        "query_ms_p50": round(latencies[len(latencies) // 2] * 1000, 3),
+        "query_ms_p99": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Fake Wolai API — an in-memory stand-in for openapi.wolai.com used by the
+load test. It serves a deterministic synthetic page tree and implements the
+endpoints the server calls: /token, GET /blocks/{id}, GET /blocks/{id}/children
+(paginated), POST /blocks, PATCH and DELETE /blocks/{id}.
+
+Two extra endpoints are for the harness, not the server:
+  GET /_meta   root ID, page IDs and sample titles of the generated tree
+  GET /_stats  upstream request counts by method
+
+Usage:
+    python benchmarks/fake_wolai.py [--port 0] [--pages 300] [--latency-ms 20]
+Prints one JSON line ({"url": ..., "root": ...}) once it is listening.
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = (
+    "project roadmap meeting notes design review api guide release plan budget "
+    "research draft archive weekly report onboarding checklist retro backlog "
+    "architecture database migration 项目 会议 记录 设计 计划 周报 文档 需求"
+).split()
+_BLOCK_RE = re.compile(r"^/v1/blocks/([^/]+)(/children)?$")
+
+
+class Tree:
+    """Synthetic block tree; every mutation goes through one lock."""
+
+    def __init__(self, pages: int, blocks_per_page: int, fanout: int, seed: int):
+        self.lock = threading.Lock()
+        self.blocks = {}
+        self.children = {}
+        self.stats = {"GET": 0, "POST": 0, "PATCH": 0, "DELETE": 0}
+        self._ids = itertools.count(1)
+        rng = random.Random(seed)
+
+        self.root = self.add(None, "page", "Knowledge Base")
+        self.pages = [self.root]
+        frontier = [self.root]
+        while len(self.pages) < pages + 1:
+            parent = frontier.pop(0)
+            for _ in range(fanout):
+                if len(self.pages) >= pages + 1:
+                    break
+                title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+                page = self.add(parent, "page", title)
+                self.pages.append(page)
+                frontier.append(page)
+        for page in self.pages:
+            for n in range(blocks_per_page):
+                kind = rng.choice(("text", "text", "text", "heading_2", "bull_list", "code"))
+                text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 25)))
+                extra = {"language": "python"} if kind == "code" else {}
+                self.add(page, kind, f"{n}. {text}", **extra)
+
+    def add(self, parent, kind, text, **extra) -> str:
+        block_id = f"blk{next(self._ids):07d}"
+        block = {"id": block_id, "type": kind, "parent_id": parent or "", "content": [{"title": text}]}
+        block.update(extra)
+        self.blocks[block_id] = block
+        self.children[block_id] = []
+        if parent:
+            self.children[parent].append(block_id)
+        return block_id
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    tree: Tree = None
+    latency = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _count(self):
+        with self.tree.lock:
+            self.tree.stats[self.command] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        tree = self.tree
+        if url.path == "/_meta":
+            with tree.lock:
+                titles = [tree.blocks[page]["content"][0]["title"] for page in tree.pages]
+            return self._send({"root": tree.root, "pages": tree.pages, "titles": titles})
+        if url.path == "/_stats":
+            with tree.lock:
+                return self._send(dict(tree.stats))
+
+        self._count()
+        match = _BLOCK_RE.match(url.path)
+        with tree.lock:
+            if not match or match.group(1) not in tree.blocks:
+                return self._send({"message": "block not found"}, 404)
+            block_id = match.group(1)
+            if not match.group(2):
+                return self._send({"data": dict(tree.blocks[block_id])})
+            query = parse_qs(url.query)
+            start = int(query.get("start_cursor", ["0"])[0] or 0)
+            size = int(query.get("page_size", ["200"])[0])
+            ids = tree.children[block_id]
+            page = [dict(tree.blocks[child]) for child in ids[start:start + size]]
+            more = start + size < len(ids)
+        self._send({"data": page, "has_more": more, "next_cursor": str(start + size) if more else None})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._body()
+        if path == "/v1/token":
+            return self._send({"data": {"app_token": "fake-token"}})
+        self._count()
+        if path != "/v1/blocks":
+            return self._send({"message": "not found"}, 404)
+
+        tree = self.tree
+        parent = body.get("parent_id")
+        created = []
+        with tree.lock:
+            if parent not in tree.blocks:
+                return self._send({"message": "parent not found"}, 404)
+            siblings = tree.children[parent]
+            after = body.get("after")
+            for spec in body.get("blocks", []):
+                title = spec.get("content") or ""
+                if isinstance(title, list):
+                    title = "".join(part.get("title", "") for part in title if isinstance(part, dict))
+                # Keep level, checked, language etc. so re-reads match what was written
+                extra = {key: value for key, value in spec.items() if key not in ("id", "type", "content")}
+                block_id = tree.add(None, spec.get("type", "text"), title, **extra)
+                tree.blocks[block_id]["parent_id"] = parent
+                if after in siblings:
+                    siblings.insert(siblings.index(after) + 1, block_id)
+                    after = block_id
+                else:
+                    siblings.append(block_id)
+                created.append(f"https://www.wolai.com/{parent}#{block_id}")
+        self._send({"data": created})
+
+    def do_PATCH(self):
+        self._count()
+        match = _BLOCK_RE.match(urlparse(self.path).path)
+        body = self._body()
+        with self.tree.lock:
+            if not match or match.group(1) not in self.tree.blocks:
+                return self._send({"message": "block not found"}, 404)
+            block = self.tree.blocks[match.group(1)]
+            block.update({key: value for key, value in body.items() if key != "id"})
+            payload = dict(block)
+        self._send({"data": payload})
+
+    def do_DELETE(self):
+        self._count()
+        match = _BLOCK_RE.match(urlparse(self.path).path)
+        with self.tree.lock:
+            if not match or match.group(1) not in self.tree.blocks:
+                return self._send({"message": "block not found"}, 404)
+            block = self.tree.blocks.pop(match.group(1))
+            siblings = self.tree.children.get(block["parent_id"], [])
+            if block["id"] in siblings:
+                siblings.remove(block["id"])
+        self._send({"data": block["id"]})
+
+
+def serve(port=0, pages=300, blocks_per_page=40, fanout=8, latency_ms=20.0, seed=1) -> ThreadingHTTPServer:
+    """Starts the fake API on a background thread and returns the server."""
+    handler = type("FakeWolaiHandler", (Handler,), {
+        "tree": Tree(pages, blocks_per_page, fanout, seed),
+        "latency": latency_ms / 1000,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-wolai", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (0 = any free port)")
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the generated tree")
+    parser.add_argument("--blocks-per-page", type=int, default=40)
+    parser.add_argument("--fanout", type=int, default=8, help="Child pages per page")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated upstream latency per call")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.pages, args.blocks_per_page, args.fanout, args.latency_ms, args.seed)
+    host, port = server.server_address[:2]
+    print(json.dumps({"url": f"http://{host}:{port}/v1", "root": server.RequestHandlerClass.tree.root}), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
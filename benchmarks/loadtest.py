@@ -0,0 +1,323 @@
+"""
+Load test — how many concurrent clients one wolai-mcp process can serve.
+
+For every (transport, client count) step this starts a fresh fake Wolai API
+(benchmarks/fake_wolai.py) and a fresh server process pointed at it, then
+runs N simulated clients for a fixed duration. Each client loops over a
+weighted mix of get_page_content, search_pages_by_title, add_block and
+get_breadcrumbs calls.
+
+  stdio             one server process, N clients multiplexed over its single
+                    session (what one agent host with N parallel sub-agents sees)
+  streamable-http   one server process, N independent HTTP sessions
+
+Usage:
+    python benchmarks/loadtest.py [--transport stdio,streamable-http]
+        [--clients 1,4,16] [--duration 20] [--latency-ms 20]
+        [--mix get_page_content=40,get_breadcrumbs=30,search_pages_by_title=20,add_block=10]
+        [--out results.json]
+Prints one JSON object (throughput, p50/p99 latency, error rate and RSS
+samples per step); compare runs made on the same machine.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import timedelta
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, "..", "src")
+DEFAULT_MIX = "get_page_content=40,get_breadcrumbs=30,search_pages_by_title=20,add_block=10"
+# Tools report failures as text rather than raising
+ERROR_PREFIXES = ("❌", "Error", "Search error")
+RSS_INTERVAL = 0.5
+
+
+# ─── Processes ────────────────────────────────────────────────────────────────
+def start_fake(args) -> tuple[subprocess.Popen, dict]:
+    """Starts the fake API in its own process so it doesn't share our GIL."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "fake_wolai.py"),
+         "--pages", str(args.pages), "--latency-ms", str(args.latency_ms), "--seed", str(args.seed)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    info = json.loads(process.stdout.readline())
+    with urllib.request.urlopen(info["url"].removesuffix("/v1") + "/_meta") as response:
+        info.update(json.load(response))
+    return process, info
+
+
+def upstream_stats(fake: dict) -> dict:
+    with urllib.request.urlopen(fake["url"].removesuffix("/v1") + "/_stats") as response:
+        return json.load(response)
+
+
+def server_env(fake: dict) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": SRC + os.pathsep + env.get("PYTHONPATH", ""),
+        "WOLAI_BASE_URL": fake["url"],
+        "WOLAI_APP_ID": "loadtest",
+        "WOLAI_APP_SECRET": "loadtest",
+        "WOLAI_ROOT_ID": fake["root"],
+    })
+    env.pop("WOLAI_MIRROR", None)
+    env.pop("WOLAI_SYNC_INTERVAL", None)
+    return env
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_kb(pid: int):
+    """Resident set size of pid in KiB, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def find_server_pid():
+    """The stdio server is spawned by the MCP client, so look it up among our children."""
+    me = str(os.getpid())
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else ():
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = f.read().rsplit(")", 1)[1].split()[1]
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if ppid == me and b"wolai_mcp.server" in cmdline:
+            return int(entry)
+    return None
+
+
+# ─── Sessions ─────────────────────────────────────────────────────────────────
+@asynccontextmanager
+async def stdio_sessions(fake: dict, clients: int):
+    """Yields ([session] * clients, server pid) for one shared stdio session."""
+    params = StdioServerParameters(
+        command=sys.executable, args=["-m", "wolai_mcp.server"], env=server_env(fake),
+    )
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(params, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield [session] * clients, find_server_pid()
+
+
+@asynccontextmanager
+async def http_sessions(fake: dict, clients: int):
+    """Yields (sessions, server pid) for one HTTP server with a session per client."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "wolai_mcp.server", "--transport", "streamable-http", "--port", str(port)],
+        env=server_env(fake), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(200):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        url = f"http://127.0.0.1:{port}/mcp"
+        async with AsyncExitStack() as stack:
+            sessions = []
+            for _ in range(clients):
+                read, write, _ = await stack.enter_async_context(streamablehttp_client(url, timeout=timedelta(seconds=120)))
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+                sessions.append(session)
+            yield sessions, process.pid
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+TRANSPORTS = {"stdio": stdio_sessions, "streamable-http": http_sessions}
+
+
+# ─── Workload ─────────────────────────────────────────────────────────────────
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def make_call(tool: str, rng: random.Random, fake: dict) -> dict:
+    pages = fake["pages"]
+    if tool == "get_page_content":
+        return {"block_id": rng.choice(pages)}
+    if tool == "get_breadcrumbs":
+        return {"block_id": rng.choice(pages)}
+    if tool == "search_pages_by_title":
+        words = rng.choice(fake["titles"][1:]).split()
+        return {"query": " ".join(words[:rng.randint(1, 2)]), "max_seconds": 10, "max_requests": 100}
+    if tool == "add_block":
+        return {"parent_id": rng.choice(pages[1:]), "content": f"load test note {rng.random():.6f}"}
+    raise ValueError(f"unknown tool in mix: {tool}")
+
+
+async def client_loop(session, number: int, args, fake: dict, mix: dict, deadline: float, samples: list):
+    rng = random.Random(args.seed * 1000 + number)
+    tools, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        tool = rng.choices(tools, weights)[0]
+        arguments = make_call(tool, rng, fake)
+        started = time.perf_counter()
+        error = None
+        try:
+            result = await session.call_tool(tool, arguments)
+            text = "".join(getattr(item, "text", "") for item in result.content)
+            if result.isError or text.startswith(ERROR_PREFIXES):
+                error = text[:120]
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"[:120]
+        samples.append((started, time.perf_counter() - started, tool, error))
+
+
+async def sample_rss(pid, started: float, out: list, stop: asyncio.Event):
+    while pid is not None:
+        out.append([round(time.perf_counter() - started, 2), rss_kb(pid)])
+        try:
+            await asyncio.wait_for(stop.wait(), RSS_INTERVAL)
+            break
+        except asyncio.TimeoutError:
+            pass
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    latencies = [latency * 1000 for _, latency, _, _ in samples]
+    errors = [error for _, _, _, error in samples if error]
+    summary = {
+        "calls": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2) if latencies else None,
+            "p50": round(percentile(latencies, 0.50), 2) if latencies else None,
+            "p99": round(percentile(latencies, 0.99), 2) if latencies else None,
+            "max": round(max(latencies), 2) if latencies else None,
+        },
+        "errors": len(errors),
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+    }
+    if errors:
+        summary["error_samples"] = sorted(set(errors))[:5]
+    return summary
+
+
+async def run_step(transport: str, clients: int, args, mix: dict) -> dict:
+    fake_process, fake = start_fake(args)
+    try:
+        async with TRANSPORTS[transport](fake, clients) as (sessions, pid):
+            before = upstream_stats(fake)
+            rss = []
+            stop = asyncio.Event()
+            started = time.perf_counter()
+            deadline = started + args.duration
+            sampler = asyncio.create_task(sample_rss(pid, started, rss, stop))
+            samples = []
+            await asyncio.gather(*(
+                client_loop(session, number, args, fake, mix, deadline, samples)
+                for number, session in enumerate(sessions)
+            ))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await sampler
+            after = upstream_stats(fake)
+    finally:
+        fake_process.terminate()
+        fake_process.wait(timeout=10)
+
+    step = {"transport": transport, "clients": clients, "elapsed_s": round(elapsed, 2)}
+    step.update(summarize(samples, elapsed))
+    step["by_tool"] = {
+        tool: summarize([sample for sample in samples if sample[2] == tool], elapsed)
+        for tool in mix
+    }
+    step["upstream_calls"] = {method: after[method] - before.get(method, 0) for method in after}
+    known = [kb for _, kb in rss if kb is not None]
+    step["rss_kb"] = {"start": known[0] if known else None, "peak": max(known) if known else None, "samples": rss}
+    return step
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    steps = []
+    for transport in args.transport.split(","):
+        for clients in (int(n) for n in args.clients.split(",")):
+            step = await run_step(transport.strip(), clients, args, mix)
+            print(
+                f"{step['transport']:>16} clients={clients:<3} rps={step['throughput_rps']:<8} "
+                f"p50={step['latency_ms']['p50']}ms p99={step['latency_ms']['p99']}ms errors={step['errors']}",
+                file=sys.stderr,
+            )
+            steps.append(step)
+    return {
+        "python": sys.version.split()[0],
+        "duration_s": args.duration,
+        "upstream_latency_ms": args.latency_ms,
+        "pages": args.pages,
+        "mix": mix,
+        "steps": steps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transport", default="stdio,streamable-http", help="Comma-separated transports")
+    parser.add_argument("--clients", default="1,4,16", help="Comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per step")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated upstream latency per call")
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the fake tree")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="tool=weight pairs")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    for transport in args.transport.split(","):
+        if transport.strip() not in TRANSPORTS:
+            parser.error(f"unknown transport: {transport}")
+    report = asyncio.run(run(args))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
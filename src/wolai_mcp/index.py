@@ -0,0 +1,287 @@
+"""
+In-memory fuzzy title index.
+
+Titles are broken into n-grams — padded trigrams for Latin words, unigrams
+and bigrams for CJK runs — and kept in an inverted index. Queries are
+scored by how much of the query's n-grams a title covers, so typos and
+word-order differences still match, and exact substrings rank first.
+
+Pinyin matching for Chinese titles is enabled when `pypinyin` is installed
+(pip install 'wolai-mcp[pinyin]').
+"""
+import heapq
+import re
+import unicodedata
+from collections import Counter
+from itertools import chain
+from operator import itemgetter
+
+_TOKEN_RE = re.compile(r"[㐀-鿿豈-﫿]+|[^\W_㐀-鿿豈-﫿]+")
+_CJK_RE = re.compile(r"[㐀-鿿豈-﫿]")
+# Pinyin n-grams share the posting table under this prefix
+_PINYIN = "py:"
+_EMPTY = frozenset()
+# Trigram similarity at which a title word is highlighted as a typo of a query word
+_TYPO_SIMILARITY = 0.4
+
+_lazy_pinyin = None
+
+
+def _pinyin(text: str) -> list:
+    """Returns one pinyin syllable per CJK character, or [] without pypinyin."""
+    global _lazy_pinyin
+    if _lazy_pinyin is None:
+        try:
+            from pypinyin import lazy_pinyin
+            _lazy_pinyin = lazy_pinyin
+        except ImportError:
+            _lazy_pinyin = False
+    if not _lazy_pinyin:
+        return []
+    return _lazy_pinyin(text)
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    return text.replace("**", "").replace("*", "")
+
+
+def ngrams(text: str) -> set:
+    """N-grams of already-normalized text."""
+    grams = set()
+    for token in _TOKEN_RE.findall(text):
+        if _CJK_RE.match(token):
+            grams.update(token)
+            grams.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            padded = f" {token} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def pinyin_ngrams(text: str) -> set:
+    """Pinyin n-grams for the CJK parts of normalized text (empty without pypinyin)."""
+    grams = set()
+    for token in _TOKEN_RE.findall(text):
+        if _CJK_RE.match(token):
+            spelled = "".join(_pinyin(token))
+            if spelled:
+                grams.update(_PINYIN + gram for gram in ngrams(spelled))
+    return grams
+
+
+def _combine(common: int, query_size: int, title_size: int) -> float:
+    coverage = common / query_size
+    dice = 2 * common / (query_size + title_size)
+    # Coverage dominates so titles holding the whole query always rank first;
+    # dice breaks ties in favour of titles with less extra text.
+    return 0.9 * coverage + 0.1 * dice
+
+
+def score(query: str, title: str) -> float:
+    """Fuzzy match score of a single title, from 0 (no match) to 1."""
+    query_norm, title_norm = normalize(query).strip(), normalize(title)
+    if not query_norm or not title_norm:
+        return 0.0
+    query_grams, title_grams = ngrams(query_norm), ngrams(title_norm)
+    if not query_grams:
+        return 0.0
+    best = _combine(len(query_grams & title_grams), len(query_grams), len(title_grams))
+    title_pinyin = pinyin_ngrams(title_norm)
+    if title_pinyin:
+        query_pinyin = {_PINYIN + gram for gram in ngrams(query_norm.replace(" ", ""))}
+        best = max(best, _combine(len(query_pinyin & title_pinyin), len(query_pinyin), len(title_pinyin)))
+    if query_norm in title_norm:
+        best = max(best, 0.9 + 0.1 * best)
+    return best
+
+
+def _similarity(word: str, other: str) -> float:
+    """Dice coefficient of two words' padded trigrams."""
+    grams, other_grams = ngrams(word), ngrams(other)
+    if not grams or not other_grams:
+        return 0.0
+    return 2 * len(grams & other_grams) / (len(grams) + len(other_grams))
+
+
+def highlight(query: str, title: str, marker: str = "**") -> str:
+    """
+    Wraps the parts of title that match the query in marker: occurrences of
+    whole query words and CJK bigrams, title words that are a likely typo of
+    a query word, and (with pypinyin) characters spelled by the query.
+    """
+    lowered = "".join(char.lower()[:1] or char for char in title)
+    marked = [False] * len(title)
+    pieces = set()
+    words = []
+    for token in _TOKEN_RE.findall(normalize(query)):
+        pieces.add(token)
+        if _CJK_RE.match(token):
+            pieces.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            words.append(token)
+
+    for piece in pieces:
+        start = lowered.find(piece)
+        while start != -1:
+            for i in range(start, start + len(piece)):
+                marked[i] = True
+            start = lowered.find(piece, start + 1)
+
+    # Typos: a whole title word close enough to a query word
+    for match in _TOKEN_RE.finditer(lowered):
+        word = match.group()
+        if _CJK_RE.match(word) or any(marked[match.start():match.end()]):
+            continue
+        if any(_similarity(word, query_word) >= _TYPO_SIMILARITY for query_word in words):
+            for i in range(match.start(), match.end()):
+                marked[i] = True
+
+    # Pinyin hits: mark CJK characters whose syllable appears in the query
+    compact_query = normalize(query).replace(" ", "")
+    if compact_query.isascii():
+        for i, char in enumerate(title):
+            if _CJK_RE.match(char):
+                syllable = "".join(_pinyin(char))
+                if syllable and syllable in compact_query:
+                    marked[i] = True
+
+    out = []
+    inside = False
+    for char, is_marked in zip(title, marked):
+        if is_marked != inside:
+            out.append(marker)
+            inside = is_marked
+        out.append(char)
+    if inside:
+        out.append(marker)
+    return "".join(out)
+
+
+def _max_score(common: int, query_size: int) -> float:
+    """Best score any title sharing `common` n-grams could reach."""
+    return _combine(common, query_size, common)
+
+
+class TitleIndex:
+    """Incremental inverted n-gram index over block titles."""
+
+    def __init__(self):
+        self._docs = {}       # doc number → (block_id, title)
+        self._numbers = {}    # block_id → doc number
+        self._postings = {}   # n-gram → set of doc numbers
+        self._sizes = []      # doc number → n-gram count
+        self._pinyin_sizes = []
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, block_id: str) -> bool:
+        return block_id in self._numbers
+
+    def add(self, block_id: str, title: str):
+        """Adds or updates a title. Unchanged titles are a no-op."""
+        number = self._numbers.get(block_id)
+        if number is not None:
+            if self._docs[number][1] == title:
+                return
+            self.remove(block_id)
+        if not title:
+            return
+
+        normalized = normalize(title)
+        grams, pinyin = ngrams(normalized), pinyin_ngrams(normalized)
+        number = len(self._sizes)
+        self._sizes.append(len(grams))
+        self._pinyin_sizes.append(len(pinyin))
+        self._docs[number] = (block_id, title)
+        self._numbers[block_id] = number
+        for gram in grams | pinyin:
+            self._postings.setdefault(gram, set()).add(number)
+
+    def remove(self, block_id: str):
+        number = self._numbers.pop(block_id, None)
+        if number is None:
+            return
+        _, title = self._docs.pop(number)
+        normalized = normalize(title)
+        for gram in ngrams(normalized) | pinyin_ngrams(normalized):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(number)
+                if not posting:
+                    del self._postings[gram]
+
+    def _match(self, grams: set, sizes: list, threshold: float, limit: int) -> dict:
+        """Scores the documents that can reach threshold. Returns doc number → score."""
+        size = len(grams)
+        postings = sorted((self._postings.get(gram, _EMPTY) for gram in grams), key=len)
+        if not postings[-1]:
+            return {}
+
+        # Fast path: if enough titles contain every n-gram and the worst of
+        # the best `limit` still beats any partial match, nothing else can rank.
+        if postings[0]:
+            everywhere = postings[0].intersection(*postings[1:])
+            if len(everywhere) >= limit:
+                best = heapq.nsmallest(limit, everywhere, key=sizes.__getitem__)
+                scores = {number: _combine(size, size, sizes[number]) for number in best}
+                if min(scores.values()) >= _max_score(size - 1, size):
+                    return scores
+
+        # A title holding `needed` of the n-grams must appear in one of the
+        # rarest size - needed + 1 postings; the rest are only probed. Strict
+        # levels are cheap (few, rare postings), so try those first and stop
+        # as soon as no looser level could outrank what was found.
+        floor = next(common for common in range(1, size + 1) if _max_score(common, size) >= threshold or common == size)
+        levels = sorted({needed for needed in (size - 1, size - 2, floor) if needed >= floor}, reverse=True)
+        scores = {}
+        for needed in levels:
+            split = size - needed + 1
+            counts = Counter(chain.from_iterable(postings[:split]))
+            for posting in postings[split:]:
+                counts.update(counts.keys() & posting)
+            scores = {
+                number: _combine(common, size, sizes[number])
+                for number, common in counts.items()
+                if common >= needed
+            }
+            if needed > floor and len(scores) >= limit:
+                if heapq.nlargest(limit, scores.values())[-1] >= _max_score(needed - 1, size):
+                    break
+        return scores
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.5) -> list:
+        """
+        Returns up to limit matches as (score, block_id, title) tuples,
+        best first.
+        """
+        query_norm = normalize(query).strip()
+        query_grams = ngrams(query_norm)
+        if not query_grams or limit <= 0:
+            return []
+
+        # Substring matches get a bonus below, so keep slightly weaker candidates
+        threshold = min_score * 0.9
+        scores = self._match(query_grams, self._sizes, threshold, limit)
+
+        compact = query_norm.replace(" ", "")
+        if compact.isascii():
+            pinyin_grams = {_PINYIN + gram for gram in ngrams(compact)}
+            for number, value in self._match(pinyin_grams, self._pinyin_sizes, threshold, limit).items():
+                if value > scores.get(number, 0.0):
+                    scores[number] = value
+
+        # Substring bonus only reorders near the top, so only check the leaders
+        leaders = heapq.nlargest(limit * 4, scores.items(), key=itemgetter(1))
+        results = []
+        for number, value in leaders:
+            if value < threshold:
+                break
+            block_id, title = self._docs[number]
+            if query_norm in normalize(title):
+                value = max(value, 0.9 + 0.1 * value)
+            if value >= min_score:
+                results.append((value, block_id, title))
+        results.sort(key=lambda result: (-result[0], len(result[2])))
+        return results[:limit]
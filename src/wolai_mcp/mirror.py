@@ -0,0 +1,216 @@
+"""
+Local mirror file — an on-disk snapshot of a Wolai page tree.
+
+Layout:
+  <path>      Append-only data file: a sequence of gzip members, each holding
+              a chunk of JSON lines. `zcat <path>` yields plain JSONL.
+  <path>.idx  Offset index, one JSON array per line:
+              [key, chunk_offset, chunk_length, line_in_chunk]
+              When a key appears more than once the last entry wins, which is
+              how delta snapshots supersede older records. A missing or short
+              index is rebuilt from the data file on open.
+
+Records are dicts with a string "id". Block records look like
+  {"id": ..., "block": {...}, "children": [ids], "snap": n}
+where "children" is present only for blocks whose children were listed.
+The special key "@snap" holds the latest snapshot marker, and "@progress"
+the export's checkpoint within it.
+"""
+import gzip
+import json
+import mmap
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+# Records per compressed chunk. Larger chunks compress better; smaller
+# chunks make random reads cheaper and lose less on an interrupted export.
+CHUNK_RECORDS = 256
+# Decompressed chunks kept in memory for repeated lookups
+_CHUNK_CACHE_SIZE = 32
+# Bytes read at a time when scanning the data file for chunks
+_SCAN_BLOCK = 1 << 16
+
+
+class Mirror:
+    """Random-access reader/appender for a mirror file."""
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.writable = writable
+        self._index = {}
+        self._pending = OrderedDict()
+        self._chunks = OrderedDict()
+        self._map = None
+        self._map_size = 0
+        # Guards the chunk cache and the mapping, which readers share across threads
+        self._lock = threading.Lock()
+
+        if not writable and not os.path.exists(path):
+            raise FileNotFoundError(f"Mirror file not found: {path}")
+
+        last = self._load_index()
+        if writable:
+            self._index_file = open(self.index_path, "a", encoding="utf-8")
+        end = self._scan(last) if os.path.exists(path) else 0
+        if writable:
+            # Drop a chunk cut short by an interrupted flush, so the data file
+            # and index agree again
+            with open(path, "ab") as f:
+                f.truncate(end)
+            self._data = open(path, "ab")
+
+    def _load_index(self) -> int:
+        """Loads the offset index and returns the offset of the last indexed chunk."""
+        last = 0
+        if not os.path.exists(self.index_path):
+            return last
+        valid = 0
+        with open(self.index_path, "rb") as f:
+            for raw in f:
+                try:
+                    key, offset, length, line = json.loads(raw)
+                except ValueError:
+                    break
+                valid += len(raw)
+                self._index[key] = (offset, length, line)
+                last = max(last, offset)
+        if self.writable and valid != os.path.getsize(self.index_path):
+            with open(self.index_path, "ab") as f:
+                f.truncate(valid)
+        return last
+
+    def _scan(self, start: int) -> int:
+        """
+        Indexes every complete chunk from offset start on, which covers a last
+        chunk whose index lines were cut short, chunks flushed but never
+        indexed and a missing index file. Returns the end of the last
+        complete chunk.
+        """
+        offset = start
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            decoder, fed, parts = zlib.decompressobj(31), 0, []
+            data = f.read(_SCAN_BLOCK)
+            while data:
+                fed += len(data)
+                try:
+                    parts.append(decoder.decompress(data))
+                except zlib.error:
+                    if self.writable:
+                        raise ValueError(f"Mirror file is corrupt at offset {offset}: {self.path}")
+                    break
+                if not decoder.eof:
+                    data = f.read(_SCAN_BLOCK)
+                    continue
+                length = fed - len(decoder.unused_data)
+                for line, raw in enumerate(b"".join(parts).splitlines()):
+                    key = json.loads(raw)["id"]
+                    if self._index.get(key) != (offset, length, line):
+                        self._index[key] = (offset, length, line)
+                        if self.writable:
+                            self._index_file.write(json.dumps([key, offset, length, line], ensure_ascii=False) + "\n")
+                offset += length
+                data = decoder.unused_data or f.read(_SCAN_BLOCK)
+                decoder, fed, parts = zlib.decompressobj(31), 0, []
+        if self.writable:
+            self._index_file.flush()
+        return offset
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pending or key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index.keys() | self._pending.keys())
+
+    def keys(self):
+        return self._index.keys() | self._pending.keys()
+
+    def get(self, key: str):
+        """Returns the latest record stored under key, or None."""
+        if key in self._pending:
+            return self._pending[key]
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        offset, length, line = entry
+        with self._lock:
+            raw = self._chunk(offset, length)[line]
+        return json.loads(raw)
+
+    def records(self):
+        """Yields the latest version of every record, decompressing each chunk once."""
+        by_chunk = {}
+        for key, (offset, length, line) in self._index.items():
+            if key in self._pending:
+                continue
+            by_chunk.setdefault((offset, length), []).append(line)
+        for (offset, length), lines in sorted(by_chunk.items()):
+            chunk = gzip.decompress(self._view(offset + length)[offset:offset + length]).splitlines()
+            for line in sorted(lines):
+                yield json.loads(chunk[line])
+        yield from self._pending.values()
+
+    def _chunk(self, offset: int, length: int) -> list:
+        lines = self._chunks.get(offset)
+        if lines is not None:
+            self._chunks.move_to_end(offset)
+            return lines
+        view = self._view(offset + length)
+        lines = gzip.decompress(view[offset:offset + length]).splitlines()
+        self._chunks[offset] = lines
+        if len(self._chunks) > _CHUNK_CACHE_SIZE:
+            self._chunks.popitem(last=False)
+        return lines
+
+    def _view(self, needed: int):
+        """Memory-maps the data file, remapping if it has grown past the mapped size."""
+        if self._map is None or self._map_size < needed:
+            if self._map is not None:
+                self._map.close()
+            with open(self.path, "rb") as f:
+                self._map_size = os.fstat(f.fileno()).st_size
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def put(self, record: dict):
+        """Queues a record; it is written with the next chunk."""
+        if not self.writable:
+            raise PermissionError("Mirror opened read-only")
+        self._pending[record["id"]] = record
+        self._pending.move_to_end(record["id"])
+        if len(self._pending) >= CHUNK_RECORDS:
+            self.flush()
+
+    def flush(self):
+        """Compresses pending records into one chunk and indexes it."""
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        payload = b"".join(
+            json.dumps(self._pending[key], ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            for key in keys
+        )
+        chunk = gzip.compress(payload)
+        offset = self._data.tell()
+        self._data.write(chunk)
+        self._data.flush()
+        os.fsync(self._data.fileno())
+
+        # The index is only written once the chunk is durable
+        for line, key in enumerate(keys):
+            self._index[key] = (offset, len(chunk), line)
+            self._index_file.write(json.dumps([key, offset, len(chunk), line], ensure_ascii=False) + "\n")
+        self._index_file.flush()
+        self._pending.clear()
+
+    def close(self):
+        if self.writable:
+            self.flush()
+            self._data.close()
+            self._index_file.close()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
@@ -3,17 +3,44 @@ Wolai MCP Server — Connect AI agents to your Wolai knowledge base.
 All credentials are configured via environment variables in your MCP settings.
 """
 import os
-import requests
+import base64
+import functools
+import hashlib
+import heapq
+import importlib
+import threading
+import time
 import json
+import re
+import secrets
 import sys
+from collections import OrderedDict, deque
+
+
+class _LazyModule:
+    """Stands in for a module until first use, then imports it and takes its place."""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        globals()[self._name] = module
+        return getattr(module, attr)
+
+
+# requests costs ~150ms to import; keep it off the startup path
+requests = _LazyModule("requests")
 
 # Check if mcp is installed
 try:
-    from mcp.server.fastmcp import FastMCP
+    from mcp.server.fastmcp import Context, FastMCP
 except ImportError:
     print("Error: 'mcp' package is not installed. Please install it with: pip install 'mcp[cli]'")
     sys.exit(1)
 
+from .index import TitleIndex, highlight as _highlight, score as _title_score
+
 # Initialize FastMCP Server
 mcp = FastMCP("wolai-knowledge-base")
 
@@ -25,10 +52,12 @@ mcp = FastMCP("wolai-knowledge-base")
 # ║  获取地址: https://www.wolai.com/dev                             ║
 # ╚═══════════════════════════════════════════════════════════════════╝
 
-BASE_URL = "https://openapi.wolai.com/v1"
+# WOLAI_BASE_URL points the server at another API endpoint (e.g. a local fake for load tests)
+BASE_URL = os.environ.get("WOLAI_BASE_URL", "https://openapi.wolai.com/v1").rstrip("/")
 
 # ─── Auth ─────────────────────────────────────────────────────────────────────
 _token = None
+_token_lock = threading.Lock()
 
 
 def _get_app_id() -> str:
@@ -61,24 +90,29 @@ def get_token():
     if _token:
         return _token
 
-    url = f"{BASE_URL}/token"
-    payload = {
-        "appId": _get_app_id(),
-        "appSecret": _get_app_secret(),
-    }
-
-    try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        if "data" in data and "app_token" in data["data"]:
-            _token = data["data"]["app_token"]
+    # Callers that arrive while the warm-up is authenticating wait for its token
+    with _token_lock:
+        if _token:
             return _token
-        else:
-            raise ValueError(f"Failed to retrieve token: {data}")
-    except Exception as e:
-        print(f"Auth Error: {e}", file=sys.stderr)
-        raise
+
+        url = f"{BASE_URL}/token"
+        payload = {
+            "appId": _get_app_id(),
+            "appSecret": _get_app_secret(),
+        }
+
+        try:
+            response = requests.post(url, json=payload)
+            response.raise_for_status()
+            data = _response_json(response)
+            if "data" in data and "app_token" in data["data"]:
+                _token = data["data"]["app_token"]
+                return _token
+            else:
+                raise ValueError(f"Failed to retrieve token: {data}")
+        except Exception as e:
+            print(f"Auth Error: {e}", file=sys.stderr)
+            raise
 
 
 def get_headers():
@@ -88,6 +122,291 @@ def get_headers():
         "Content-Type": "application/json"
     }
 
+# ─── API ──────────────────────────────────────────────────────────────────────
+
+# Wolai caps children listings at 200 items per request
+_MAX_PAGE_SIZE = 200
+# Page size used for budgeted reads when only max_chars is given
+_BUDGET_PAGE_SIZE = 50
+
+# Local mirror file served instead of the API when WOLAI_MIRROR is set
+_mirror = None
+
+# Fuzzy title index, filled with every page/heading title the API returns
+_title_index = TitleIndex()
+_title_index_lock = threading.Lock()
+# Block types whose titles are indexed and searched
+_SEARCH_FOLLOW_TYPES = ("page", "heading_1", "heading_2")
+# Minimum fuzzy score for a title to count as a match
+_MATCH_SCORE = 0.5
+
+
+def _get_mirror():
+    """Returns the mirror named by WOLAI_MIRROR, or None to use the live API."""
+    global _mirror
+    path = os.environ.get("WOLAI_MIRROR", "")
+    if not path:
+        return None
+    if _mirror is None or _mirror.path != path:
+        from .mirror import Mirror
+        _mirror = Mirror(path)
+    return _mirror
+
+
+# ─── JSON ─────────────────────────────────────────────────────────────────────
+
+# Edit timestamp field names the API has used
+_EDIT_TIME_KEYS = ("edited_at", "edited_time", "last_edited_time", "updated_at")
+# Block fields the tools read; the read cache keeps only these
+_BLOCK_FIELDS = ("id", "type", "content", "parent_id", "level", "checked", "language") + _EDIT_TIME_KEYS
+
+_orjson_loads = None
+
+
+def _response_json(response):
+    """
+    Decodes a response body. With orjson installed (pip install
+    'wolai-mcp[fast]') the raw bytes go straight to orjson; otherwise
+    requests' own response.json() is used, which beats json.loads on bytes.
+    WOLAI_JSON=json forces the latter.
+    """
+    global _orjson_loads
+    if _orjson_loads is None:
+        _orjson_loads = False
+        if os.environ.get("WOLAI_JSON", "auto") != "json":
+            try:
+                import orjson
+                _orjson_loads = orjson.loads
+            except ImportError:
+                pass
+    if _orjson_loads:
+        return _orjson_loads(response.content)
+    return response.json()
+
+
+def _slim_block(block: dict) -> dict:
+    """Projects an API block down to _BLOCK_FIELDS."""
+    return {key: block[key] for key in _BLOCK_FIELDS if key in block}
+
+
+# ─── Cache ────────────────────────────────────────────────────────────────────
+
+# Recent API reads, keyed by ("block", id) or ("children", id, cursor, page_size)
+_cache = {}
+_cache_lock = threading.Lock()
+_CACHE_MAX_ENTRIES = 5000
+# Reads in progress, so concurrent identical requests share one upstream call
+_inflight = {}
+_read_stats = {"upstream": 0, "cache_hits": 0, "coalesced": 0}
+# Startup prefetches (see _warm_up), key → (fetched at, value), each kept
+# until the first read of its key or _PREFETCH_MAX_AGE seconds
+_prefetched = {}
+_PREFETCH_MAX_AGE = 60
+
+
+class _Flight:
+    """One upstream read that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+def _cache_ttl() -> float:
+    return float(os.environ.get("WOLAI_CACHE_TTL", "0") or 0)
+
+
+def _cached(key: tuple, fetch, fresh: bool = False, prefetch: bool = False):
+    """
+    Returns a cached value for key, calling fetch() on a miss or when fresh is set.
+    Concurrent misses for the same key share a single fetch() call; fresh
+    reads never join a call that was already in flight. prefetch holds the
+    result for the next read of key, whatever the cache TTL, unless that read
+    joined the call itself or comes more than _PREFETCH_MAX_AGE seconds later.
+    """
+    ttl = _cache_ttl()
+    with _cache_lock:
+        if not fresh:
+            held = _prefetched.pop(key, None)
+            if held is not None and time.monotonic() - held[0] <= _PREFETCH_MAX_AGE:
+                _read_stats["cache_hits"] += 1
+                return held[1]
+        if ttl > 0 and not fresh:
+            hit = _cache.get(key)
+            if hit and hit[0] > time.monotonic():
+                _read_stats["cache_hits"] += 1
+                return hit[1]
+        flight = None if fresh else _inflight.get(key)
+        if flight is not None:
+            flight.waiters += 1
+            _read_stats["coalesced"] += 1
+        else:
+            leader = _inflight[key] = _Flight()
+
+    if flight is not None:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    try:
+        leader.value = fetch()
+    except Exception as exc:
+        leader.error = exc
+        raise
+    finally:
+        with _cache_lock:
+            _read_stats["upstream"] += 1
+            # A flight dropped by _invalidate or replaced by a fresh read may
+            # hold old data: its waiters still get it, but it isn't cached
+            current = _inflight.get(key) is leader
+            if current:
+                del _inflight[key]
+            if prefetch and leader.error is None and current and not leader.waiters:
+                _prefetched[key] = (time.monotonic(), leader.value)
+            if ttl > 0 and leader.error is None and current:
+                now = time.monotonic()
+                if len(_cache) >= _CACHE_MAX_ENTRIES:
+                    for stale in [k for k, (expires, _) in _cache.items() if expires <= now]:
+                        del _cache[stale]
+                    if len(_cache) >= _CACHE_MAX_ENTRIES:
+                        _cache.clear()
+                _cache[key] = (now + ttl, leader.value)
+        leader.done.set()
+    return leader.value
+
+
+def _invalidate(block_id: str):
+    """Drops cached reads of a block and its children, e.g. after writing to it."""
+    with _cache_lock:
+        for key in [key for key in _cache if key[1] == block_id]:
+            del _cache[key]
+        for key in [key for key in _prefetched if key[1] == block_id]:
+            del _prefetched[key]
+        # Reads already in flight may predate the write; new callers start their own
+        for key in [key for key in _inflight if key[1] == block_id]:
+            del _inflight[key]
+
+
+def _get_block(block_id: str, fresh: bool = False, prefetch: bool = False) -> dict:
+    """Fetches a single block and returns its ``data`` object."""
+    mirror = _get_mirror()
+    if mirror is not None:
+        record = mirror.get(block_id)
+        if record is None:
+            raise LookupError(f"Block {block_id} is not in the mirror")
+        return record["block"]
+    return _cached(("block", block_id), lambda: _slim_block(_fetch_block(block_id)), fresh, prefetch)
+
+
+def _fetch_block(block_id: str) -> dict:
+    response = requests.get(f"{BASE_URL}/blocks/{block_id}", headers=get_headers())
+    if response.status_code == 404:
+        _forget_titles([block_id])
+    response.raise_for_status()
+    block = _response_json(response).get("data", {})
+    _index_titles([block])
+    return block
+
+
+def _get_children_page(
+    block_id: str, start_cursor: str = "", page_size: int = 0, fresh: bool = False, prefetch: bool = False
+) -> tuple[list, str]:
+    """
+    Fetches one page of a block's children.
+    Returns (children, next_cursor); next_cursor is "" when nothing is left.
+    """
+    mirror = _get_mirror()
+    if mirror is not None:
+        record = mirror.get(block_id)
+        if record is None or "children" not in record:
+            raise LookupError(f"Children of {block_id} are not in the mirror")
+        child_ids = record["children"]
+        start = int(start_cursor or 0)
+        end = start + page_size if page_size else len(child_ids)
+        children = [mirror.get(child_id)["block"] for child_id in child_ids[start:end]]
+        return children, str(end) if end < len(child_ids) else ""
+
+    def fetch():
+        children, next_cursor = _fetch_children_page(block_id, start_cursor, page_size)
+        return [_slim_block(child) for child in children], next_cursor
+
+    return _cached(("children", block_id, start_cursor, page_size), fetch, fresh, prefetch)
+
+
+def _fetch_children_page(block_id: str, start_cursor: str, page_size: int) -> tuple[list, str]:
+    params = {}
+    if start_cursor:
+        params["start_cursor"] = start_cursor
+    if page_size:
+        params["page_size"] = min(page_size, _MAX_PAGE_SIZE)
+    response = requests.get(
+        f"{BASE_URL}/blocks/{block_id}/children", headers=get_headers(), params=params or None
+    )
+    if response.status_code == 404:
+        _forget_titles([block_id])
+    response.raise_for_status()
+    body = _response_json(response)
+    next_cursor = (body.get("next_cursor") or "") if body.get("has_more", True) else ""
+    children = body.get("data", [])
+    _index_titles(children)
+    return children, next_cursor
+
+
+def _iter_children(block_id: str, fresh: bool = False):
+    """Yields every child of a block, following pagination."""
+    start_cursor = ""
+    while True:
+        children, start_cursor = _get_children_page(block_id, start_cursor, fresh=fresh)
+        yield from children
+        if not start_cursor:
+            return
+
+
+def _iter_raw_children(block_id: str):
+    """Like _iter_children, but straight from the API with every field kept."""
+    start_cursor = ""
+    while True:
+        children, start_cursor = _fetch_children_page(block_id, start_cursor, 0)
+        yield from children
+        if not start_cursor:
+            return
+
+
+def _index_titles(blocks: list):
+    """Feeds page and heading titles into the fuzzy title index."""
+    with _title_index_lock:
+        for block in blocks:
+            if block.get("id") and block.get("type") in _SEARCH_FOLLOW_TYPES:
+                _title_index.add(block["id"], _plain_text(block.get("content", "")))
+
+
+def _forget_titles(block_ids: list):
+    """Drops deleted or moved-away blocks from the fuzzy title index."""
+    with _title_index_lock:
+        for block_id in block_ids:
+            _title_index.remove(block_id)
+
+
+def _encode_cursor(state: dict) -> str:
+    """Packs resume state into an opaque cursor string for tool callers."""
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> dict:
+    """Inverse of _encode_cursor. Raises ValueError on malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not isinstance(state, dict):
+        raise ValueError("invalid cursor")
+    return state
+
 # ─── Helpers ──────────────────────────────────────────────────────────────────
 
 def parse_wolai_content(content_obj) -> str:
@@ -113,6 +432,45 @@ def parse_wolai_content(content_obj) -> str:
     return "".join(text_parts)
 
 
+def _plain_text(content_obj) -> str:
+    """Like parse_wolai_content, but without any Markdown style markers."""
+    if not content_obj or not isinstance(content_obj, list):
+        return str(content_obj or "")
+    return "".join(item.get("title", "") if isinstance(item, dict) else str(item) for item in content_obj)
+
+
+def _render_block(child: dict) -> str:
+    """Renders one child block as a Markdown line. Returns "" for empty blocks."""
+    c_type = child.get("type", "text")
+    c_content = parse_wolai_content(child.get("content", ""))
+
+    if not c_content and c_type != "divider":
+        return ""
+
+    if c_type == "heading_1":
+        return f"# {c_content}"
+    elif c_type == "heading_2":
+        return f"## {c_content}"
+    elif c_type == "heading_3":
+        return f"### {c_content}"
+    elif c_type == "text":
+        return c_content
+    elif c_type == "bulleted_list":
+        return f"- {c_content}"
+    elif c_type == "numbered_list":
+        return f"1. {c_content}"
+    elif c_type == "callout":
+        return f"> 💡 {c_content}"
+    elif c_type in ["code", "python", "javascript", "java"]:
+        return f"```\n{c_content}\n```"
+    elif c_type == "page":
+        return f"📄 [Child Page]: {c_content} (ID: {child.get('id')})"
+    elif c_type == "divider":
+        return "---"
+    else:
+        return f"[{c_type}]: {c_content}"
+
+
 # ═══════════════════════════════════════════════
 #  Configuration Tools
 # ═══════════════════════════════════════════════
@@ -134,6 +492,9 @@ def set_wolai_credentials(app_id: str, app_secret: str) -> str:
     os.environ["WOLAI_APP_ID"] = app_id
     os.environ["WOLAI_APP_SECRET"] = app_secret
     _token = None  # Force re-auth with new credentials
+    with _cache_lock:
+        _cache.clear()
+        _prefetched.clear()
     # Verify
     try:
         get_token()
@@ -158,14 +519,11 @@ def set_root_page(root_id: str) -> str:
     os.environ["WOLAI_ROOT_ID"] = root_id
     # Verify the page exists
     try:
-        headers = get_headers()
-        res = requests.get(f"{BASE_URL}/blocks/{root_id}", headers=headers)
-        if res.status_code == 200:
-            data = res.json().get("data", {})
-            title = parse_wolai_content(data.get("content", ""))
-            return f"✅ Root page set to: '{title}' (ID: {root_id})"
-        else:
-            return f"⚠️ Root page set to {root_id}, but could not verify (status {res.status_code})"
+        data = _get_block(root_id)
+        title = parse_wolai_content(data.get("content", ""))
+        return f"✅ Root page set to: '{title}' (ID: {root_id})"
+    except requests.HTTPError as e:
+        return f"⚠️ Root page set to {root_id}, but could not verify (status {e.response.status_code})"
     except Exception as e:
         return f"⚠️ Root page set to {root_id}, but verification failed: {e}"
 
@@ -183,6 +541,13 @@ def get_wolai_config() -> str:
     secret_status = f"✅ ...{app_secret[-8:]}" if app_secret else "❌ Not set"
     root_status = f"✅ {root_id}" if root_id else "❌ Not set"
     auth_status = "✅ Authenticated" if _token else "⏳ Not yet authenticated"
+    with _cache_lock:
+        cache_status = f"{len(_cache)} entries (TTL {_cache_ttl():.0f}s)"
+        saved = _read_stats["cache_hits"] + _read_stats["coalesced"]
+        reads_status = (
+            f"{_read_stats['upstream']} upstream, {saved} saved "
+            f"({_read_stats['cache_hits']} cached, {_read_stats['coalesced']} coalesced)"
+        )
 
     return (
         f"🔧 Wolai MCP Configuration\n"
@@ -191,6 +556,8 @@ def get_wolai_config() -> str:
         f"  App Secret:  {secret_status}\n"
         f"  Root Page:   {root_status}\n"
         f"  Auth Token:  {auth_status}\n"
+        f"  Cache:       {cache_status}\n"
+        f"  API reads:   {reads_status}\n"
         f"  API URL:     {BASE_URL}\n"
         f"  Get credentials: https://www.wolai.com/dev"
     )
@@ -200,77 +567,103 @@ def get_wolai_config() -> str:
 #  Read Tools
 # ═══════════════════════════════════════════════
 
+def _in_thread(func):
+    """
+    Runs a blocking tool on a worker thread. FastMCP calls plain functions on
+    the event loop, so without this parallel tool calls would wait on each
+    other's API requests instead of overlapping (and sharing them via _cached).
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        import anyio.to_thread
+
+        return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs))
+
+    return wrapper
+
+
 @mcp.tool()
+@_in_thread
 def get_root_info() -> str:
     """Returns the current Root ID and its basic info (Annual Index page)."""
     root_id = _get_root_id()
     if not root_id:
         return "❌ WOLAI_ROOT_ID is not set. Use set_root_page or set it in your MCP config env."
-    headers = get_headers()
     try:
-        res = requests.get(f"{BASE_URL}/blocks/{root_id}", headers=headers)
-        if res.status_code == 200:
-            data = res.json().get("data", {})
-            title = parse_wolai_content(data.get("content", ""))
-            return f"Current Root Directory: '{title}' (ID: {root_id})"
+        data = _get_block(root_id)
+        title = parse_wolai_content(data.get("content", ""))
+        return f"Current Root Directory: '{title}' (ID: {root_id})"
     except Exception:
         pass
     return f"Default Root ID: {root_id}"
 
 
 @mcp.tool()
-def get_page_content(block_id: str) -> str:
+@_in_thread
+def get_page_content(block_id: str, max_chars: int = 0, max_blocks: int = 0, cursor: str = "") -> str:
     """
     Retrieves the content of a specific Wolai page or block by its ID.
+    Large pages can be read in parts: when a budget is hit, the output ends with
+    a cursor that continues from where this call stopped.
 
     Args:
         block_id: The ID of the block/page to read.
+        max_chars: Stop once the rendered content would exceed this many characters (0 = no limit).
+        max_blocks: Stop after this many child blocks (0 = no limit).
+        cursor: Continuation cursor returned by a previous truncated call.
     """
-    url = f"{BASE_URL}/blocks/{block_id}"
     try:
-        headers = get_headers()
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        block_data = response.json().get("data", {})
-
-        children_url = f"{BASE_URL}/blocks/{block_id}/children"
-        children_response = requests.get(children_url, headers=headers)
-        children_response.raise_for_status()
-        children_data = children_response.json().get("data", [])
-
-        title = parse_wolai_content(block_data.get("content", ""))
-        content_lines = [f"# Page: {title} (ID: {block_id})"]
-
-        for child in children_data:
-            c_type = child.get("type", "text")
-            raw_content = child.get("content", "")
-            c_content = parse_wolai_content(raw_content)
-
-            if not c_content and c_type != "divider":
-                continue
+        if cursor:
+            state = _decode_cursor(cursor)
+            if state.get("id") != block_id:
+                return f"❌ Cursor does not belong to page {block_id}."
+            page_cursor, skip = state.get("page", ""), int(state.get("skip", 0))
+            content_lines = [f"# Page (continued) (ID: {block_id})"]
+        else:
+            block_data = _get_block(block_id)
+            title = parse_wolai_content(block_data.get("content", ""))
+            page_cursor, skip = "", 0
+            content_lines = [f"# Page: {title} (ID: {block_id})"]
+
+        budgeted = max_chars > 0 or max_blocks > 0
+        used_chars = len(content_lines[0])
+        used_blocks = 0
+        resume = None
+
+        while resume is None:
+            # Only ask upstream for as many children as the budget can still take
+            page_size = 0
+            if budgeted:
+                page_size = skip + (max_blocks - used_blocks if max_blocks else _BUDGET_PAGE_SIZE)
+            children, next_cursor = _get_children_page(block_id, page_cursor, page_size)
+
+            for index in range(skip, len(children)):
+                line = _render_block(children[index])
+                if not line:
+                    continue
+                if max_chars and used_blocks and used_chars + 2 + len(line) > max_chars:
+                    resume = {"id": block_id, "page": page_cursor, "skip": index}
+                    break
+                content_lines.append(line)
+                used_blocks += 1
+                used_chars += 2 + len(line)
+                if max_blocks and used_blocks >= max_blocks:
+                    if index + 1 < len(children):
+                        resume = {"id": block_id, "page": page_cursor, "skip": index + 1}
+                    elif next_cursor:
+                        resume = {"id": block_id, "page": next_cursor, "skip": 0}
+                    break
+
+            if resume is not None or not next_cursor or (max_blocks and used_blocks >= max_blocks):
+                break
+            skip = max(0, skip - len(children))
+            page_cursor = next_cursor
 
-            if c_type == "heading_1":
-                content_lines.append(f"# {c_content}")
-            elif c_type == "heading_2":
-                content_lines.append(f"## {c_content}")
-            elif c_type == "heading_3":
-                content_lines.append(f"### {c_content}")
-            elif c_type == "text":
-                content_lines.append(c_content)
-            elif c_type == "bulleted_list":
-                content_lines.append(f"- {c_content}")
-            elif c_type == "numbered_list":
-                content_lines.append(f"1. {c_content}")
-            elif c_type == "callout":
-                content_lines.append(f"> 💡 {c_content}")
-            elif c_type in ["code", "python", "javascript", "java"]:
-                content_lines.append(f"```\n{c_content}\n```")
-            elif c_type == "page":
-                content_lines.append(f"📄 [Child Page]: {c_content} (ID: {child.get('id')})")
-            elif c_type == "divider":
-                content_lines.append("---")
-            else:
-                content_lines.append(f"[{c_type}]: {c_content}")
+        if resume is not None:
+            content_lines.append(
+                f"---\n⏭️ Output truncated after {used_blocks} block(s). "
+                f"Continue with get_page_content(block_id=\"{block_id}\", cursor=\"{_encode_cursor(resume)}\")"
+            )
 
         return "\n\n".join(content_lines)
     except Exception as e:
@@ -278,6 +671,7 @@ def get_page_content(block_id: str) -> str:
 
 
 @mcp.tool()
+@_in_thread
 def list_child_blocks(block_id: str) -> str:
     """
     Lists the immediate child blocks/pages of a given block ID.
@@ -285,11 +679,8 @@ def list_child_blocks(block_id: str) -> str:
     Args:
         block_id: The ID of the parent block/page.
     """
-    url = f"{BASE_URL}/blocks/{block_id}/children"
     try:
-        response = requests.get(url, headers=get_headers())
-        response.raise_for_status()
-        data = response.json().get("data", [])
+        data = list(_iter_children(block_id))
 
         if not data:
             return "No children found."
@@ -308,58 +699,195 @@ def list_child_blocks(block_id: str) -> str:
         return f"Error listing children for {block_id}: {str(e)}"
 
 
+# Parents of recent search hits; their subtrees are expanded first next time
+_recent_hit_parents = deque(maxlen=200)
+# Unfinished searches by cursor token. The frontier can hold thousands of
+# subtrees, so it stays here and callers only get the short token.
+_search_sessions = OrderedDict()
+_SEARCH_SESSIONS_MAX = 32
+
+
+def _search_priority(query: str, title: str, block_id: str, depth: int) -> float:
+    score = _title_score(query, title)
+    if block_id in _recent_hit_parents:
+        score += 0.5
+    return score - 0.1 * depth
+
+
 @mcp.tool()
-def search_pages_by_title(query: str, start_id: str = "", max_depth: int = 2) -> str:
+async def search_pages_by_title(
+    query: str,
+    start_id: str = "",
+    max_depth: int = 2,
+    max_seconds: float = 30,
+    max_requests: int = 300,
+    cursor: str = "",
+    ctx: Context = None,
+) -> str:
     """
-    Finds pages with titles containing the query string, starting from a root ID.
-    Since Wolai lacks a global search API, this tool explores the page tree.
+    Finds pages whose titles match the query, starting from a root ID.
+    Matching is fuzzy (typos, word order, pinyin when available) and results
+    are ranked best match first.
+    Since Wolai lacks a global search API, this tool explores the page tree,
+    expanding the most promising subtrees first (titles that partially match,
+    or that held recent hits). When a budget runs out, the pages found so far
+    are returned with a cursor that continues the search.
 
     Args:
         query: The keyword to search for in page titles.
         start_id: The ID to start searching from (default is your annual root).
         max_depth: How many levels deep to search (default 2 to save time).
+        max_seconds: Time budget for this call (0 = no limit).
+        max_requests: API request budget for this call, one per page listed (0 = no limit).
+        cursor: Continuation cursor returned by a previous call that ran out of budget
+                (kept for the last 32 unfinished searches).
     """
-    if not start_id:
-        start_id = _get_root_id()
-    if not start_id:
-        return "❌ No root page set. Use set_root_page or provide start_id."
+    import anyio
 
     found = []
-    visited = set()
-    queue = [(start_id, 0)]
-    headers = get_headers()
+    started = time.monotonic()
+    requests_used = 0
+    sequence = 0
+    frontier = []
 
     try:
-        while queue:
-            current_id, depth = queue.pop(0)
-            if current_id in visited or depth > max_depth:
-                continue
-            visited.add(current_id)
+        if cursor:
+            state = _search_sessions.get(cursor)
+            if state is None:
+                return "❌ Cursor expired or unknown. Start the search again without a cursor."
+            if state["query"] != query:
+                return "❌ Cursor belongs to a different query."
+            del _search_sessions[cursor]
+            start_id, max_depth = state["start_id"], state["max_depth"]
+            frontier, sequence = state["frontier"], state["sequence"]
+        else:
+            if not start_id:
+                start_id = _get_root_id()
+            if not start_id:
+                return "❌ No root page set. Use set_root_page or provide start_id."
+            try:
+                data = await anyio.to_thread.run_sync(_get_block, start_id)
+                requests_used += 1
+                title = _plain_text(data.get("content", ""))
+                score = _title_score(query, title)
+                if score >= _MATCH_SCORE:
+                    found.append((score, title, start_id, 0))
+            except (requests.HTTPError, LookupError):
+                pass
+            if max_depth > 0:
+                frontier = [(0.0, 0, start_id, 0)]
+
+        while frontier:
+            out_of_time = max_seconds and time.monotonic() - started >= max_seconds
+            out_of_requests = max_requests and requests_used >= max_requests
+            if out_of_time or out_of_requests:
+                break
 
-            res = requests.get(f"{BASE_URL}/blocks/{current_id}", headers=headers)
-            if res.status_code == 200:
-                data = res.json().get("data", {})
-                title = parse_wolai_content(data.get("content", ""))
-                if query.lower() in title.lower():
-                    found.append(f"- FOUND: {title} (ID: {current_id}) at depth {depth}")
-
-            if depth < max_depth:
-                c_res = requests.get(f"{BASE_URL}/blocks/{current_id}/children", headers=headers)
-                if c_res.status_code == 200:
-                    children = c_res.json().get("data", [])
-                    for child in children:
-                        if child.get("type") in ["page", "heading_1", "heading_2"]:
-                            queue.append((child.get("id"), depth + 1))
-
-        if not found:
+            _, _, current_id, depth = heapq.heappop(frontier)
+            try:
+                children = await anyio.to_thread.run_sync(lambda: list(_iter_children(current_id)))
+            except (requests.HTTPError, LookupError):
+                children = []
+            requests_used += 1
+
+            for child in children:
+                if child.get("type") not in _SEARCH_FOLLOW_TYPES:
+                    continue
+                child_id = child.get("id")
+                title = _plain_text(child.get("content", ""))
+                score = _title_score(query, title)
+                if score >= _MATCH_SCORE:
+                    found.append((score, title, child_id, depth + 1))
+                    _recent_hit_parents.append(current_id)
+                if depth + 1 < max_depth:
+                    sequence += 1
+                    priority = -_search_priority(query, title, child_id, depth + 1)
+                    heapq.heappush(frontier, (priority, sequence, child_id, depth + 1))
+
+            if ctx is not None:
+                await ctx.report_progress(
+                    requests_used,
+                    max_requests or None,
+                    f"{len(found)} found, {len(frontier)} subtrees queued",
+                )
+
+        found.sort(key=lambda hit: (-hit[0], hit[3]))
+        lines = [
+            f"- FOUND: {_highlight(query, title)} (ID: {block_id}) at depth {depth}, score {score:.2f}"
+            for score, title, block_id, depth in found
+        ]
+
+        if frontier:
+            token = secrets.token_urlsafe(6)
+            _search_sessions[token] = {
+                "query": query,
+                "start_id": start_id,
+                "max_depth": max_depth,
+                "frontier": frontier,
+                "sequence": sequence,
+            }
+            while len(_search_sessions) > _SEARCH_SESSIONS_MAX:
+                _search_sessions.popitem(last=False)
+            elapsed = time.monotonic() - started
+            if not lines:
+                lines.append(f"No pages matching '{query}' found yet.")
+            lines.append(
+                f"\n⏸️ Budget reached after {requests_used} request(s) in {elapsed:.1f}s; "
+                f"{len(frontier)} subtree(s) left unexplored. Continue with "
+                f"search_pages_by_title(query=\"{query}\", cursor=\"{token}\")"
+            )
+        elif not lines:
             return f"No pages matching '{query}' found within depth {max_depth} of {start_id}."
 
-        return "\n".join(found)
+        return "\n".join(lines)
     except Exception as e:
         return f"Search error: {str(e)}"
 
 
+_indexed_mirror = ""
+
+
 @mcp.tool()
+def find_pages(query: str, limit: int = 10) -> str:
+    """
+    Instantly finds pages by fuzzy title match in the local title index,
+    without calling the Wolai API. The index holds every page title seen so
+    far (by reads, searches, the sync engine or the offline mirror); use
+    search_pages_by_title to explore parts of the tree not seen yet.
+
+    Args:
+        query: Words to look for in page titles (typos and word order are tolerated).
+        limit: Maximum number of results (default 10).
+    """
+    global _indexed_mirror
+    try:
+        mirror = _get_mirror()
+        if mirror is not None and _indexed_mirror != mirror.path:
+            _index_titles([record["block"] for record in mirror.records() if "block" in record])
+            _indexed_mirror = mirror.path
+
+        with _title_index_lock:
+            size = len(_title_index)
+            results = _title_index.search(query, limit=limit, min_score=_MATCH_SCORE)
+    except Exception as e:
+        return f"Search error: {str(e)}"
+
+    if not size:
+        return (
+            "📭 The title index is empty. It fills as pages are read; run search_pages_by_title "
+            "or sync_status(run_now=True) to index the tree."
+        )
+    if not results:
+        return f"No indexed titles match '{query}' ({size} titles indexed)."
+
+    lines = [f"🔎 {len(results)} match(es) among {size} indexed titles:"]
+    for score, block_id, title in results:
+        lines.append(f"- {_highlight(query, title)} (ID: {block_id}) score {score:.2f}")
+    return "\n".join(lines)
+
+
+@mcp.tool()
+@_in_thread
 def get_breadcrumbs(block_id: str) -> str:
     """
     Returns the full path from the root to a given block, showing the page hierarchy.
@@ -370,16 +898,15 @@ def get_breadcrumbs(block_id: str) -> str:
     """
     crumbs = []
     current_id = block_id
-    headers = get_headers()
     visited = set()
 
     try:
         while current_id and current_id not in visited:
             visited.add(current_id)
-            res = requests.get(f"{BASE_URL}/blocks/{current_id}", headers=headers)
-            if res.status_code != 200:
+            try:
+                data = _get_block(current_id)
+            except (requests.HTTPError, LookupError):
                 break
-            data = res.json().get("data", {})
             title = parse_wolai_content(data.get("content", ""))
             crumbs.append(title or current_id)
 
@@ -463,14 +990,197 @@ def build_block_object(content: str, block_type: str = "text") -> dict:
 
 def _extract_id_from_response(data) -> str:
     """Extract block ID from Wolai's POST /blocks response (list of URLs)."""
-    if data and isinstance(data, list):
-        url_or_id = data[0]
+    ids = _extract_ids_from_response(data)
+    return ids[0] if ids else "unknown"
+
+
+def _extract_ids_from_response(data) -> list:
+    """Extract every block ID from Wolai's POST /blocks response."""
+    ids = []
+    for url_or_id in data if isinstance(data, list) else []:
         if isinstance(url_or_id, str):
             fragment = url_or_id.rsplit("#", 1)[-1] if "#" in url_or_id else url_or_id.rsplit("/", 1)[-1]
-            return fragment
+            ids.append(fragment)
         elif isinstance(url_or_id, dict):
-            return url_or_id.get("id", "unknown")
-    return "unknown"
+            ids.append(url_or_id.get("id", "unknown"))
+    return ids
+
+
+# Blocks per POST /blocks request when writing many blocks at once
+_MAX_BLOCKS_PER_REQUEST = 100
+
+_MD_HEADING = re.compile(r"^(#{1,3})\s+(.*)$")
+_MD_TODO = re.compile(r"^[-*+]\s+\[([ xX])\]\s+(.*)$")
+_MD_BULLET = re.compile(r"^[-*+]\s+(.*)$")
+_MD_NUMBERED = re.compile(r"^\d+[.)]\s+(.*)$")
+_MD_DIVIDER = re.compile(r"^(-{3,}|\*{3,}|_{3,})$")
+
+
+def _markdown_to_blocks(markdown: str) -> list:
+    """
+    Compiles Markdown into Wolai block objects, one block per line.
+    Supports headings, bullet/numbered/to-do lists, quotes, dividers,
+    fenced code and $$ equations; anything else becomes a text block.
+    """
+    blocks = []
+    lines = markdown.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        i += 1
+        if not line:
+            continue
+
+        if line.startswith("```"):
+            language = line[3:].strip().lower() or "plain text"
+            code = []
+            while i < len(lines) and not lines[i].strip().startswith("```"):
+                code.append(lines[i])
+                i += 1
+            i += 1  # closing fence
+            blocks.append({"type": "code", "content": [{"title": "\n".join(code)}], "language": language})
+            continue
+
+        if line.startswith("$$"):
+            equation = line[2:]
+            if equation.endswith("$$") and len(line) > 2:
+                equation = equation[:-2]
+            else:
+                parts = [equation] if equation else []
+                while i < len(lines) and not lines[i].strip().endswith("$$"):
+                    parts.append(lines[i].strip())
+                    i += 1
+                if i < len(lines):
+                    parts.append(lines[i].strip()[:-2])
+                    i += 1
+                equation = "\n".join(part for part in parts if part)
+            blocks.append(build_block_object(equation.strip(), "block_equation"))
+            continue
+
+        if _MD_DIVIDER.match(line):
+            blocks.append(build_block_object("", "divider"))
+        elif match := _MD_HEADING.match(line):
+            blocks.append(build_block_object(match.group(2), f"h{len(match.group(1))}"))
+        elif match := _MD_TODO.match(line):
+            block = build_block_object(match.group(2), "todo")
+            block["checked"] = match.group(1) != " "
+            blocks.append(block)
+        elif match := _MD_BULLET.match(line):
+            blocks.append(build_block_object(match.group(1), "bullet"))
+        elif match := _MD_NUMBERED.match(line):
+            blocks.append(build_block_object(match.group(1), "ol"))
+        elif line.startswith(">"):
+            blocks.append(build_block_object(line[1:].strip(), "quote"))
+        else:
+            blocks.append(build_block_object(line, "text"))
+    return blocks
+
+
+def _block_signature(block: dict) -> tuple:
+    """What makes two blocks equal for diffing: (type, type-specific attribute, text)."""
+    block_type = block.get("type", "text")
+    level = block.get("level")
+    if block_type in _TYPE_ALIAS_MAP:
+        block_type, alias_level = _TYPE_ALIAS_MAP[block_type]
+        level = level or alias_level
+    if block_type == "heading":
+        extra = level or 1
+    elif block_type == "todo_list":
+        extra = bool(block.get("checked"))
+    elif block_type == "code":
+        extra = (block.get("language") or "").lower()
+    else:
+        extra = None
+    return (block_type, extra, _plain_text(block.get("content", "")))
+
+
+def _align_blocks(old: list, new: list) -> list:
+    """
+    Pairs a page's current blocks with the wanted ones, in page order:
+      ("keep", old_block, new_block), ("update", old_block, new_block),
+      ("delete", old_block, None), ("insert", None, new_block)
+    """
+    import difflib
+
+    old_signatures = [_block_signature(block) for block in old]
+    new_signatures = [_block_signature(block) for block in new]
+    matcher = difflib.SequenceMatcher(None, old_signatures, new_signatures, autojunk=False)
+
+    steps = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            steps.extend(("keep", old[i1 + k], new[j1 + k]) for k in range(i2 - i1))
+            continue
+        olds, news = old[i1:i2], new[j1:j2]
+        paired = min(len(olds), len(news)) if tag == "replace" else 0
+        for index in range(paired):
+            if old_signatures[i1 + index][0] == new_signatures[j1 + index][0]:
+                steps.append(("update", olds[index], news[index]))
+            else:
+                steps.append(("delete", olds[index], None))
+                steps.append(("insert", None, news[index]))
+        steps.extend(("delete", block, None) for block in olds[paired:])
+        steps.extend(("insert", None, block) for block in news[paired:])
+    return steps
+
+
+def _lift_leading_inserts(steps: list) -> list:
+    """
+    Wolai can only insert after a block, so blocks wanted above the first
+    surviving block can't be placed directly. Instead that block is rewritten
+    into the first new block, and the other new blocks plus its own content
+    are inserted right after it. A survivor whose type doesn't match is
+    deleted and re-inserted, and the next one tried; only when none is left
+    does the page end up fully rewritten.
+    """
+    steps = list(steps)
+    while True:
+        first = next((i for i, step in enumerate(steps) if step[0] in ("keep", "update")), None)
+        if first is None:
+            return steps
+        leading = [i for i in range(first) if steps[i][0] == "insert"]
+        if not leading:
+            return steps
+
+        _, survivor, survivor_new = steps[first]
+        head = steps[leading[0]][2]
+        if _block_signature(survivor)[0] != _block_signature(head)[0]:
+            steps[first:first + 1] = [("delete", survivor, None), ("insert", None, survivor_new)]
+            continue
+
+        kind = "keep" if _block_signature(survivor) == _block_signature(head) else "update"
+        prefix = [step for i, step in enumerate(steps[:first]) if i != leading[0] and step[0] == "delete"]
+        shifted = [steps[i] for i in leading[1:]] + [("insert", None, survivor_new)]
+        return prefix + [(kind, survivor, head)] + shifted + steps[first + 1:]
+
+
+def _plan_markdown_sync(old: list, new: list) -> list:
+    """
+    Diffs a page's current child blocks against compiled Markdown blocks.
+    Returns operations in execution order:
+      ("update", old_block, new_block)   same block type, new content
+      ("delete", old_block)
+      ("insert", anchor_id, [blocks])    anchor_id None means "at the start"
+    """
+    ops = []
+    anchor = None
+    run = []
+    for kind, old_block, new_block in _lift_leading_inserts(_align_blocks(old, new)):
+        if kind == "insert":
+            run.append(new_block)
+            continue
+        if kind == "delete":
+            ops.append(("delete", old_block))
+            continue
+        if run:
+            ops.append(("insert", anchor, run))
+            run = []
+        if kind == "update":
+            ops.append(("update", old_block, new_block))
+        anchor = old_block["id"]
+    if run:
+        ops.append(("insert", anchor, run))
+    return ops
 
 
 # ═══════════════════════════════════════════════
@@ -506,7 +1216,8 @@ def create_page(title: str, parent_id: str = "") -> str:
             f"{BASE_URL}/blocks", json=payload, headers=get_headers()
         )
         response.raise_for_status()
-        data = response.json().get("data", [])
+        data = _response_json(response).get("data", [])
+        _invalidate(parent_id)
         new_id = _extract_id_from_response(data)
         return f"✅ Page '{title}' created successfully (ID: {new_id}, parent: {parent_id})"
     except Exception as e:
@@ -553,7 +1264,8 @@ def add_block(parent_id: str, content: str, block_type: str = "text") -> str:
             f"{BASE_URL}/blocks", json=payload, headers=get_headers()
         )
         response.raise_for_status()
-        data = response.json().get("data", [])
+        data = _response_json(response).get("data", [])
+        _invalidate(parent_id)
         count = len(data) if isinstance(data, list) else 1
         return f"✅ Added {count} block(s) of type '{block_type}' to {parent_id}"
     except Exception as e:
@@ -587,18 +1299,530 @@ def add_code_block(parent_id: str, code: str, language: str = "python") -> str:
             f"{BASE_URL}/blocks", json=payload, headers=get_headers()
         )
         response.raise_for_status()
+        _invalidate(parent_id)
         return f"✅ Added code block ({language}) to {parent_id}"
     except Exception as e:
         return f"❌ Failed to add code block: {str(e)}"
 
 
+@mcp.tool()
+@_in_thread
+def sync_page_from_markdown(page_id: str, markdown: str, dry_run: bool = False) -> str:
+    """
+    Makes a page's content match the given Markdown, changing only what differs.
+    The page's current blocks are diffed against the Markdown and only the
+    needed updates, deletes and inserts are sent (inserts batched), so
+    regenerating a long page where one line changed costs a couple of calls.
+    Child pages on the page are never touched. Blocks added above the first
+    existing one are placed by rewriting that block and inserting after it.
+
+    Supported Markdown: # / ## / ### headings, - bullets, 1. numbered items,
+    - [ ] / - [x] to-dos, > quotes, --- dividers, ``` code fences, $$ equations.
+    Other lines become text blocks.
+
+    Args:
+        page_id: The page to update.
+        markdown: The full desired content of the page.
+        dry_run: Only report the planned changes, without applying them.
+    """
+    try:
+        children = list(_iter_children(page_id, fresh=True))
+    except Exception as e:
+        return f"❌ Failed to read page {page_id}: {str(e)}"
+
+    old = [child for child in children if child.get("type") != "page" and child.get("id")]
+    new = _markdown_to_blocks(markdown)
+    ops = _plan_markdown_sync(old, new)
+    counts = {
+        "update": sum(1 for op in ops if op[0] == "update"),
+        "delete": sum(1 for op in ops if op[0] == "delete"),
+        "insert": sum(len(op[2]) for op in ops if op[0] == "insert"),
+    }
+    summary = f"{counts['update']} update(s), {counts['insert']} insert(s), {counts['delete']} delete(s)"
+
+    if not ops:
+        return f"✅ Page {page_id} already matches ({len(new)} block(s)); nothing to change."
+    if dry_run:
+        lines = [f"📝 Planned for {page_id}: {summary}"]
+        for op in ops:
+            if op[0] == "update":
+                lines.append(f"- update {op[1]['id']}: {_block_signature(op[2])[2][:80]}")
+            elif op[0] == "delete":
+                lines.append(f"- delete {op[1]['id']}: {_block_signature(op[1])[2][:80]}")
+            else:
+                where = f"after {op[1]}" if op[1] else "at the start"
+                lines.append(f"- insert {len(op[2])} block(s) {where}")
+        return "\n".join(lines)
+
+    last_child = children[-1]["id"] if children else None
+    calls = 0
+    applied = 0
+    touched = []
+    try:
+        for op in ops:
+            if op[0] == "update":
+                old_block, new_block = op[1], op[2]
+                touched.append(old_block["id"])
+                response = requests.patch(
+                    f"{BASE_URL}/blocks/{old_block['id']}", json=new_block, headers=get_headers()
+                )
+                calls += 1
+                response.raise_for_status()
+            elif op[0] == "delete":
+                touched.append(op[1]["id"])
+                response = requests.delete(f"{BASE_URL}/blocks/{op[1]['id']}", headers=get_headers())
+                calls += 1
+                response.raise_for_status()
+                _forget_titles([op[1]["id"]])
+            else:
+                anchor, blocks = op[1], op[2]
+                for start in range(0, len(blocks), _MAX_BLOCKS_PER_REQUEST):
+                    payload = {"parent_id": page_id, "blocks": blocks[start:start + _MAX_BLOCKS_PER_REQUEST]}
+                    # Appending after the page's last child needs no position
+                    if anchor and anchor != last_child:
+                        payload["after"] = anchor
+                    response = requests.post(f"{BASE_URL}/blocks", json=payload, headers=get_headers())
+                    calls += 1
+                    response.raise_for_status()
+                    new_ids = _extract_ids_from_response(_response_json(response).get("data", []))
+                    if new_ids and anchor:
+                        anchor = new_ids[-1]
+            applied += 1
+    except Exception as e:
+        return (
+            f"❌ Sync of {page_id} stopped after {applied} of {len(ops)} operation(s) "
+            f"({calls} API call(s)): {str(e)}"
+        )
+    finally:
+        for block_id in [page_id] + touched:
+            _invalidate(block_id)
+
+    return f"✅ Synced {page_id}: {summary} in {calls} API call(s); {len(new)} block(s) total."
+
+
+# ═══════════════════════════════════════════════
+#  Sync Engine
+# ═══════════════════════════════════════════════
+
+# Wolai has no change feed, so changes are found by comparing per-page
+# fingerprints between passes. A page's edit timestamp only covers the page
+# itself, not its descendants, so skipping is a shortcut between full walks:
+# a quick pass skips the subtree of a page whose title and edit timestamp are
+# unchanged, and a full walk re-lists everything. Full walks run on the first
+# pass, on sync_status(run_now=True), and at least every
+# WOLAI_SYNC_FULL_INTERVAL seconds (default 600; 0 makes every pass full).
+# A change deep below an unchanged page can therefore go unreported for up
+# to that interval plus one poll interval.
+
+# Block types the sync walk descends into
+_SYNC_FOLLOW_TYPES = ("page",)
+
+_sync_lock = threading.Lock()
+_sync_state = {}                   # page_id → fingerprint dict
+_sync_changes = deque(maxlen=500)  # most recent changes, oldest first
+_sync_info = {
+    "root": "",
+    "passes": 0,
+    "last_run": None,
+    "last_duration": 0.0,
+    "last_listed": 0,
+    "last_skipped": 0,
+    "last_full": None,
+    "last_error": "",
+    "interval": 0.0,
+    "next_run": None,
+}
+_sync_thread = None
+
+
+def _hash(value) -> str:
+    raw = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _edit_time(block: dict):
+    for key in _EDIT_TIME_KEYS:
+        if block.get(key):
+            return block[key]
+    return None
+
+
+def _block_fingerprint(block: dict) -> dict:
+    """Fingerprint of a block as seen in its parent's children listing."""
+    return {
+        "title": parse_wolai_content(block.get("content", "")),
+        "content": _hash(block.get("content", "")),
+        "edited": _edit_time(block),
+    }
+
+
+def _record_change(kind: str, page_id: str, title: str):
+    _sync_changes.append({"time": time.time(), "kind": kind, "id": page_id, "title": title})
+
+
+def _forget_subtree(page_id: str, seen: set):
+    """Marks a skipped subtree as still present so it isn't reported as removed."""
+    stack = [page_id]
+    while stack:
+        current = stack.pop()
+        seen.add(current)
+        stack.extend(_sync_state.get(current, {}).get("pages", []))
+
+
+def _sync_full_interval() -> float:
+    return float(os.environ.get("WOLAI_SYNC_FULL_INTERVAL", "600") or 0)
+
+
+def _sync_pass(root_id: str, full: bool = False) -> int:
+    """
+    Walks the tree under root_id. A quick pass re-lists only pages that may
+    have changed; a full pass (forced by full, or when the last full walk is
+    older than WOLAI_SYNC_FULL_INTERVAL) re-lists every page.
+    Returns the number of changes recorded. Callers must hold _sync_lock.
+    """
+    if _sync_info["root"] != root_id:
+        _sync_state.clear()
+        _sync_info["root"] = root_id
+        _sync_info["last_full"] = None
+
+    # Until a pass completes, the state is a baseline still being built, not
+    # something to diff against (a failed first pass leaves it half-filled)
+    last_full = _sync_info["last_full"]
+    first_pass = last_full is None
+    full = full or first_pass or time.time() - last_full >= _sync_full_interval()
+    if root_id not in _sync_state:
+        _sync_state[root_id] = {"parent": "", **_block_fingerprint(_get_block(root_id, fresh=True))}
+
+    started = time.time()
+    changes = 0
+    listed = skipped = 0
+    seen = {root_id}
+    stack = [root_id]
+
+    while stack:
+        page_id = stack.pop()
+        entry = _sync_state[page_id]
+        children = list(_iter_children(page_id, fresh=True))
+        listed += 1
+
+        child_ids = _hash([child.get("id") for child in children])
+        body = _hash([child.get("content", "") for child in children])
+        if not first_pass and "children" in entry and (entry["children"] != child_ids or entry["body"] != body):
+            _record_change("edited", page_id, entry["title"])
+            changes += 1
+        entry["children"], entry["body"] = child_ids, body
+
+        pages = []
+        for child in children:
+            child_id = child.get("id")
+            if not child_id or child.get("type") not in _SYNC_FOLLOW_TYPES:
+                continue
+            pages.append(child_id)
+            fingerprint = _block_fingerprint(child)
+            previous = _sync_state.get(child_id)
+
+            if previous is None:
+                if not first_pass:
+                    _record_change("added", child_id, fingerprint["title"])
+                    changes += 1
+                _sync_state[child_id] = {"parent": page_id, **fingerprint}
+                stack.append(child_id)
+                continue
+
+            if previous["content"] != fingerprint["content"]:
+                _record_change("renamed", child_id, fingerprint["title"])
+                changes += 1
+            if previous["parent"] != page_id:
+                _record_change("moved", child_id, fingerprint["title"])
+                changes += 1
+            unchanged = fingerprint["edited"] is not None and previous["edited"] == fingerprint["edited"]
+            previous.update(parent=page_id, **fingerprint)
+
+            if not full and unchanged and "children" in previous:
+                _forget_subtree(child_id, seen)
+                skipped += 1
+            else:
+                stack.append(child_id)
+
+        entry["pages"] = pages
+        seen.update(pages)
+
+    removed = [pid for pid in _sync_state if pid not in seen]
+    for page_id in removed:
+        title = _sync_state.pop(page_id)["title"]
+        if not first_pass:
+            _record_change("removed", page_id, title)
+            changes += 1
+    _forget_titles(removed)
+
+    _sync_info.update(
+        passes=_sync_info["passes"] + 1,
+        last_run=started,
+        last_duration=time.time() - started,
+        last_listed=listed,
+        last_skipped=skipped,
+        last_full=started if full else last_full,
+        last_error="",
+    )
+    return changes
+
+
+def _sync_interval_bounds() -> tuple[float, float]:
+    low = float(os.environ.get("WOLAI_SYNC_INTERVAL", "0") or 0)
+    high = float(os.environ.get("WOLAI_SYNC_MAX_INTERVAL", "0") or 0)
+    return low, max(high, low * 30)
+
+
+def _sync_loop():
+    """Background poller: backs off while nothing changes, snaps back on change."""
+    low, high = _sync_interval_bounds()
+    interval = low
+    while True:
+        root_id = _get_root_id()
+        if root_id:
+            with _sync_lock:
+                try:
+                    changed = _sync_pass(root_id)
+                except Exception as e:
+                    _sync_info["last_error"] = str(e)
+                    changed = 0
+            interval = low if changed else min(interval * 2, high)
+        _sync_info["interval"] = interval
+        _sync_info["next_run"] = time.time() + interval
+        time.sleep(interval)
+
+
+def _start_sync_thread():
+    """Starts the background sync poller if WOLAI_SYNC_INTERVAL is set."""
+    global _sync_thread
+    low, _ = _sync_interval_bounds()
+    if low <= 0 or _sync_thread is not None:
+        return
+    _sync_thread = threading.Thread(target=_sync_loop, name="wolai-sync", daemon=True)
+    _sync_thread.start()
+
+
+def _format_time(ts) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) if ts else "never"
+
+
+@mcp.tool()
+@_in_thread
+def sync_status(run_now: bool = False, limit: int = 20) -> str:
+    """
+    Shows the change-detection sync state and the most recent page changes
+    under the root page (added, removed, renamed, moved, edited).
+
+    Args:
+        run_now: Run a full sync pass right away before reporting.
+        limit: Maximum number of recent changes to list (default 20).
+    """
+    if run_now:
+        root_id = _get_root_id()
+        if not root_id:
+            return "❌ No root page set. Use set_root_page or set WOLAI_ROOT_ID."
+        with _sync_lock:
+            try:
+                _sync_pass(root_id, full=True)
+            except Exception as e:
+                _sync_info["last_error"] = str(e)
+
+    # Snapshots only: don't wait for a background pass to finish
+    info = dict(_sync_info)
+    tracked = len(_sync_state)
+    recent = list(_sync_changes)[-limit:] if limit > 0 else []
+
+    if _sync_thread is not None:
+        poller = f"every {info['interval']:.0f}s (next: {_format_time(info['next_run'])})"
+    else:
+        poller = "off (set WOLAI_SYNC_INTERVAL to enable)"
+
+    lines = [
+        "🔄 Wolai Sync Status",
+        "━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
+        f"  Root:          {info['root'] or '(not synced yet)'}",
+        f"  Pages tracked: {tracked}",
+        f"  Passes:        {info['passes']}",
+        f"  Last run:      {_format_time(info['last_run'])} ({info['last_duration']:.2f}s, "
+        f"{info['last_listed']} listed, {info['last_skipped']} subtrees skipped)",
+        f"  Last full:     {_format_time(info['last_full'])}",
+        f"  Background:    {poller}",
+    ]
+    if info["last_error"]:
+        lines.append(f"  Last error:    {info['last_error']}")
+    if recent:
+        lines.append("\nRecent changes (newest first):")
+        for change in reversed(recent):
+            lines.append(
+                f"- [{change['kind']}] {change['title'] or '(Untitled)'} "
+                f"(ID: {change['id']}) at {_format_time(change['time'])}"
+            )
+    else:
+        lines.append("\nNo changes recorded yet.")
+    return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════
+#  Mirror Export
+# ═══════════════════════════════════════════════
+
+def _export_mirror(path: str, root_id: str, resume: bool = False, delta: bool = False) -> dict:
+    """
+    Snapshots the page tree under root_id into a mirror file (see mirror.py).
+    Blocks are stored as the API returns them, with every field.
+
+    resume continues the last unfinished snapshot from its last "@progress"
+    checkpoint, the walk's stack after the last page listed. delta appends
+    a new snapshot that re-lists every page but only writes records that
+    changed. Page edit timestamps don't cover descendants, so no subtree is
+    skipped.
+    """
+    from .mirror import Mirror
+
+    exists = os.path.exists(path)
+    if exists and not (resume or delta):
+        raise FileExistsError(f"{path} already exists. Use --resume or --delta to add to it.")
+    if not exists and (resume or delta):
+        raise FileNotFoundError(f"{path} does not exist. Run a full export first.")
+
+    store = Mirror(path, writable=True)
+    try:
+        marker = store.get("@snap")
+        if resume:
+            if not marker or marker.get("finished"):
+                raise ValueError(f"Nothing to resume: the last snapshot in {path} is complete.")
+            snap, root_id, delta = marker["snap"], marker["root"], marker.get("delta", False)
+        else:
+            if delta and not marker:
+                raise ValueError(f"No snapshot in {path} to take a delta of. Run a full export first.")
+            if delta:
+                root_id = root_id or marker["root"]
+            if not root_id:
+                raise ValueError("No root page given. Pass --root or set WOLAI_ROOT_ID.")
+            snap = marker["snap"] + 1 if marker else 1
+            marker = {"id": "@snap", "snap": snap, "root": root_id, "delta": delta,
+                      "started": time.time(), "finished": None}
+            store.put(marker)
+
+        stats = {"snap": snap, "listed": 0, "written": 0}
+
+        def write(block: dict, children=None):
+            """Stores a block; children is given only right after listing it."""
+            previous = store.get(block["id"])
+            record = {"id": block["id"], "block": block, "snap": snap}
+            if children is not None:
+                record["children"] = children
+            elif previous and "children" in previous:
+                # Keep the last known listing until this snapshot lists the block
+                record["children"] = previous["children"]
+            if previous and all(previous.get(key) == record.get(key) for key in ("block", "children")):
+                return
+            store.put(record)
+            stats["written"] += 1
+
+        progress = store.get("@progress") if resume else None
+        if progress and progress["snap"] == snap:
+            stack = progress["stack"]
+        else:
+            write(_fetch_block(root_id))
+            stack = [root_id]
+
+        while stack:
+            page_id = stack.pop()
+            record = store.get(page_id)
+            children = list(_iter_raw_children(page_id))
+            stats["listed"] += 1
+            for child in children:
+                write(child)
+                if child.get("type") in _SYNC_FOLLOW_TYPES:
+                    stack.append(child["id"])
+            write(record["block"], [child["id"] for child in children])
+            # Queued after the records above, so it is never flushed ahead of them
+            store.put({"id": "@progress", "snap": snap, "stack": list(stack)})
+
+            if stats["listed"] % 50 == 0:
+                print(f"  … {stats['listed']} pages listed, {stats['written']} records written", file=sys.stderr)
+
+        store.put({**marker, "finished": time.time()})
+        return stats
+    finally:
+        store.close()
+
+
+def _run_export(args) -> int:
+    root_id = args.root or _get_root_id()
+    mode = "Resuming" if args.resume else "Delta snapshot of" if args.delta else "Exporting"
+    print(f"{mode} {root_id or '(root of last snapshot)'} → {args.path}", file=sys.stderr)
+    try:
+        stats = _export_mirror(args.path, root_id, resume=args.resume, delta=args.delta)
+    except Exception as e:
+        print(f"❌ Export failed: {e}", file=sys.stderr)
+        return 1
+    print(
+        f"✅ Snapshot {stats['snap']} complete: {stats['listed']} pages listed, "
+        f"{stats['written']} records written",
+        file=sys.stderr,
+    )
+    return 0
+
+
 # ═══════════════════════════════════════════════
 #  Entry Point
 # ═══════════════════════════════════════════════
 
+def _warm_up():
+    """
+    Authenticates and prefetches the root page and its children. The prefetched
+    reads are held for their first use within a minute, regardless of WOLAI_CACHE_TTL.
+    """
+    try:
+        get_token()
+        root_id = _get_root_id()
+        if root_id:
+            _get_block(root_id, prefetch=True)
+            _get_children_page(root_id, prefetch=True)
+    except Exception as e:
+        print(f"Warm-up skipped: {e}", file=sys.stderr)
+
+
+def _start_warmup():
+    """Runs _warm_up in the background unless disabled or serving from a mirror."""
+    if os.environ.get("WOLAI_WARMUP", "1") == "0" or _get_mirror() is not None:
+        return
+    if not (os.environ.get("WOLAI_APP_ID") and os.environ.get("WOLAI_APP_SECRET")):
+        return
+    threading.Thread(target=_warm_up, name="wolai-warmup", daemon=True).start()
+
+
 def main():
     """Entry point for the `wolai-mcp` CLI command."""
-    mcp.run()
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="wolai-mcp", description="MCP Server for Wolai")
+    commands = parser.add_subparsers(dest="command")
+    export = commands.add_parser("export", help="Snapshot the page tree into a local mirror file")
+    export.add_argument("path", help="Mirror file to write (its index is kept at PATH.idx)")
+    export.add_argument("--root", default="", help="Root page ID (default: WOLAI_ROOT_ID)")
+    mode = export.add_mutually_exclusive_group()
+    mode.add_argument("--resume", action="store_true", help="Continue an interrupted export")
+    mode.add_argument("--delta", action="store_true", help="Append only what changed since the last snapshot")
+    parser.add_argument(
+        "--transport", choices=("stdio", "sse", "streamable-http"), default="stdio",
+        help="MCP transport (default: stdio)",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address for HTTP transports")
+    parser.add_argument("--port", type=int, default=8000, help="Port for HTTP transports")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        sys.exit(_run_export(args))
+
+    _start_warmup()
+    _start_sync_thread()
+    if args.transport != "stdio":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+    mcp.run(transport=args.transport)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from wolai_mcp import server
+
+KEY = ("block", "x")
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch):
+    monkeypatch.setenv("WOLAI_CACHE_TTL", "60")
+    for state in (server._cache, server._inflight, server._prefetched):
+        state.clear()
+    monkeypatch.setattr(server, "_read_stats", {"upstream": 0, "cache_hits": 0, "coalesced": 0})
+    yield
+    for state in (server._cache, server._inflight, server._prefetched):
+        state.clear()
+
+
+class Gate:
+    """A fetch that blocks until released and counts its calls."""
+
+    def __init__(self, value="value", error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def in_background(func, *args, **kwargs) -> tuple[threading.Thread, list]:
+    """Runs func on a thread; the list receives its result or exception."""
+    out = []
+
+    def run():
+        try:
+            out.append(func(*args, **kwargs))
+        except Exception as exc:
+            out.append(exc)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, out
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_share_one_fetch():
+    fetch = Gate()
+    runs = [in_background(server._cached, KEY, fetch) for _ in range(5)]
+    wait_for(lambda: server._read_stats["coalesced"] == 4)
+    fetch.release.set()
+    for thread, _ in runs:
+        thread.join()
+
+    assert [out for _, out in runs] == [["value"]] * 5
+    assert fetch.calls == 1
+    assert server._read_stats["upstream"] == 1
+    assert server._cached(KEY, Gate("other")) == "value"
+    assert KEY not in server._inflight
+
+
+def test_invalidate_during_flight_is_not_cached():
+    old = Gate("old")
+    thread, out = in_background(server._cached, KEY, old)
+    assert old.started.wait(5)
+
+    server._invalidate("x")
+    # A read after the write starts its own call instead of joining the stale one
+    new = Gate("new")
+    new.release.set()
+    assert server._cached(KEY, new) == "new"
+
+    old.release.set()
+    thread.join()
+    assert out == ["old"]
+    assert server._cache[KEY][1] == "new"
+    assert server._cached(KEY, Gate("later")) == "new"
+
+
+def test_invalidate_without_a_later_read_caches_nothing():
+    fetch = Gate()
+    thread, _ = in_background(server._cached, KEY, fetch)
+    assert fetch.started.wait(5)
+    server._invalidate("x")
+    fetch.release.set()
+    thread.join()
+    assert KEY not in server._cache
+
+
+def test_fresh_read_does_not_join_a_flight():
+    stale = Gate("stale")
+    thread, out = in_background(server._cached, KEY, stale)
+    assert stale.started.wait(5)
+
+    fresh = Gate("fresh")
+    fresh.release.set()
+    assert server._cached(KEY, fresh, fresh=True) == "fresh"
+
+    stale.release.set()
+    thread.join()
+    assert out == ["stale"]
+    assert server._cache[KEY][1] == "fresh"
+    assert server._read_stats["coalesced"] == 0
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    fetch = Gate(error=RuntimeError("upstream down"))
+    runs = [in_background(server._cached, KEY, fetch) for _ in range(3)]
+    wait_for(lambda: server._read_stats["coalesced"] == 2)
+    fetch.release.set()
+    for thread, _ in runs:
+        thread.join()
+
+    assert all(isinstance(out[0], RuntimeError) for _, out in runs)
+    assert fetch.calls == 1
+    assert KEY not in server._cache and KEY not in server._inflight
+
+
+def test_ttl_zero_coalesces_but_caches_nothing(monkeypatch):
+    monkeypatch.setenv("WOLAI_CACHE_TTL", "0")
+    fetch = Gate()
+    runs = [in_background(server._cached, KEY, fetch) for _ in range(3)]
+    wait_for(lambda: server._read_stats["coalesced"] == 2)
+    fetch.release.set()
+    for thread, _ in runs:
+        thread.join()
+
+    assert fetch.calls == 1
+    assert not server._cache
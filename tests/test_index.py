@@ -0,0 +1,82 @@
+import pytest
+
+from wolai_mcp.index import TitleIndex, highlight, score
+
+
+@pytest.fixture
+def index():
+    titles = {
+        "p1": "Project roadmap 2026",
+        "p2": "Weekly meeting notes",
+        "p3": "API design guide",
+        "p4": "Retro notes",
+        "p5": "项目会议记录",
+        "p6": "年度计划",
+        "p7": "Architecture overview",
+    }
+    built = TitleIndex()
+    for block_id, title in titles.items():
+        built.add(block_id, title)
+    return built
+
+
+def ids(results) -> list:
+    return [block_id for _, block_id, _ in results]
+
+
+def test_exact_substring_ranks_first(index):
+    results = index.search("roadmap")
+    assert ids(results)[0] == "p1"
+    assert results[0][0] >= 0.9
+
+
+def test_typo_still_matches(index):
+    assert ids(index.search("projcet roadmap"))[:1] == ["p1"]
+    assert score("meting notes", "Weekly meeting notes") >= 0.5
+
+
+def test_reordered_words_match(index):
+    assert ids(index.search("notes meeting"))[:1] == ["p2"]
+    assert score("notes meeting", "Weekly meeting notes") > score("notes meeting", "Retro notes")
+
+
+def test_cjk_matches(index):
+    assert ids(index.search("会议记录")) == ["p5"]
+    assert ids(index.search("计划")) == ["p6"]
+
+
+def test_unrelated_query_finds_nothing(index):
+    assert index.search("zebra") == []
+    assert score("zebra", "Project roadmap 2026") < 0.5
+
+
+def test_remove_and_update(index):
+    index.remove("p1")
+    assert "p1" not in index and ids(index.search("roadmap")) == []
+    index.add("p3", "Roadmap draft")
+    assert ids(index.search("roadmap")) == ["p3"]
+    assert ids(index.search("api design")) == []
+    assert len(index) == 6
+
+
+def test_limit_and_ordering(index):
+    results = index.search("notes", limit=1)
+    assert len(results) == 1
+    assert ids(index.search("notes")) == ["p4", "p2"]
+
+
+def test_pinyin_matches_chinese_titles(index):
+    pytest.importorskip("pypinyin")
+    assert "p6" in ids(index.search("niandu jihua"))
+
+
+def test_highlight_marks_whole_words_only():
+    assert highlight("project roadmap", "api guide") == "api guide"
+    assert highlight("project roadmap", "retro notes") == "retro notes"
+    assert highlight("project roadmap", "architecture") == "architecture"
+    assert highlight("project roadmap", "Project roadmap 2026") == "**Project** **roadmap** 2026"
+
+
+def test_highlight_typos_and_cjk():
+    assert highlight("projcet", "Project plan") == "**Project** plan"
+    assert highlight("会议记录", "项目会议记录") == "项目**会议记录**"
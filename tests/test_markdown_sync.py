@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+
+from wolai_mcp import server
+from wolai_mcp.server import _block_signature, _markdown_to_blocks, _plan_markdown_sync
+
+
+def page(markdown: str, prefix: str = "old") -> list:
+    """Compiles Markdown into blocks with IDs, as if already on the page."""
+    blocks = _markdown_to_blocks(markdown)
+    for number, block in enumerate(blocks):
+        block["id"] = f"{prefix}{number}"
+    return blocks
+
+
+def apply(old: list, ops: list) -> list:
+    """Replays ops the way Wolai would and returns the page's signatures."""
+    blocks = list(old)
+    for op in ops:
+        if op[0] == "update":
+            index = next(i for i, block in enumerate(blocks) if block["id"] == op[1]["id"])
+            blocks[index] = {**op[2], "id": op[1]["id"]}
+        elif op[0] == "delete":
+            blocks = [block for block in blocks if block["id"] != op[1]["id"]]
+        else:
+            anchor, run = op[1], op[2]
+            index = len(blocks) if anchor is None else next(
+                i for i, block in enumerate(blocks) if block["id"] == anchor
+            ) + 1
+            blocks[index:index] = [{**block, "id": f"new{id(block)}"} for block in run]
+    return [_block_signature(block) for block in blocks]
+
+
+def test_markdown_to_blocks_types():
+    blocks = _markdown_to_blocks(
+        "# Title\n## Sub\n- item\n1. first\n- [x] done\n- [ ] open\n> quote\n---\n"
+        "```Python\nprint(1)\n```\n$$ e = mc^2 $$\nplain"
+    )
+    assert [_block_signature(block)[:2] for block in blocks] == [
+        ("heading", 1), ("heading", 2),
+        server._TYPE_ALIAS_MAP["bullet"], server._TYPE_ALIAS_MAP["ol"],
+        ("todo_list", True), ("todo_list", False), ("quote", None), ("divider", None),
+        ("code", "python"), ("block_equation", None), ("text", None),
+    ]
+    assert _block_signature(blocks[8])[2] == "print(1)"
+    assert _block_signature(blocks[9])[2] == "e = mc^2"
+
+
+def test_markdown_to_blocks_skips_blank_lines():
+    assert len(_markdown_to_blocks("\n\none\n\n   \ntwo\n")) == 2
+
+
+def test_equal_page_needs_nothing():
+    old = page("# Report\n- a\n- b")
+    assert _plan_markdown_sync(old, _markdown_to_blocks("# Report\n- a\n- b")) == []
+
+
+def test_changed_line_is_one_update():
+    old = page("# Report\n- a\n- b\n- c")
+    new = _markdown_to_blocks("# Report\n- a\n- B changed\n- c")
+    ops = _plan_markdown_sync(old, new)
+    assert [op[0] for op in ops] == ["update"]
+    assert ops[0][1]["id"] == "old2"
+    assert apply(old, ops) == [_block_signature(block) for block in new]
+
+
+def test_type_change_deletes_and_inserts():
+    old = page("# Report\nsome text\n- c")
+    new = _markdown_to_blocks("# Report\n- some text\n- c")
+    ops = _plan_markdown_sync(old, new)
+    assert [op[0] for op in ops] == ["delete", "insert"]
+    assert ops[1][1] == "old0"
+    assert apply(old, ops) == [_block_signature(block) for block in new]
+
+
+def test_prepend_rewrites_first_block_only():
+    old = page("\n".join(f"- entry {n}" for n in range(506)))
+    new = _markdown_to_blocks("- newest entry\n" + "\n".join(f"- entry {n}" for n in range(506)))
+    ops = _plan_markdown_sync(old, new)
+    assert [op[0] for op in ops] == ["update", "insert"]
+    assert ops[0][1]["id"] == "old0"
+    assert ops[1][1] == "old0" and len(ops[1][2]) == 1
+    assert apply(old, ops) == [_block_signature(block) for block in new]
+
+
+def test_prepend_section_of_other_types():
+    old = page("## 2026-10-17\n- shipped x\n- fixed y")
+    new = _markdown_to_blocks("## 2026-10-18\n- shipped z\n> note\n## 2026-10-17\n- shipped x\n- fixed y")
+    ops = _plan_markdown_sync(old, new)
+    assert sum(1 for op in ops if op[0] == "delete") == 0
+    assert apply(old, ops) == [_block_signature(block) for block in new]
+
+
+def test_prepend_with_no_matching_type_falls_back():
+    old = page("- a\n- b")
+    new = _markdown_to_blocks("# Title\n- a\n- b")
+    ops = _plan_markdown_sync(old, new)
+    assert apply(old, ops) == [_block_signature(block) for block in new]
+
+
+@pytest.mark.parametrize("count", [101, 250])
+def test_large_insert_is_one_op(count):
+    new = _markdown_to_blocks("\n".join(f"line {n}" for n in range(count)))
+    ops = _plan_markdown_sync([], new)
+    assert len(ops) == 1 and ops[0][0] == "insert" and len(ops[0][2]) == count
+
+
+class _Response:
+    def __init__(self, payload=None):
+        self._payload = payload if payload is not None else {}
+        self.content = server.json.dumps(self._payload).encode()
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+class _Requests:
+    """Records write calls; POST returns one created-block URL per block."""
+
+    def __init__(self):
+        self.calls = []
+        self.created = 0
+
+    def post(self, url, json=None, headers=None):
+        self.calls.append(("POST", json))
+        ids = []
+        for _ in json["blocks"]:
+            self.created += 1
+            ids.append(f"https://www.wolai.com/page#n{self.created}")
+        return _Response({"data": ids})
+
+    def patch(self, url, json=None, headers=None):
+        self.calls.append(("PATCH", url))
+        return _Response()
+
+    def delete(self, url, headers=None):
+        self.calls.append(("DELETE", url))
+        return _Response()
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    fake = _Requests()
+    monkeypatch.setattr(server, "requests", fake)
+    monkeypatch.setattr(server, "get_headers", lambda: {})
+    return fake
+
+
+def test_large_insert_is_batched_and_chained(fake_api, monkeypatch):
+    old = page("first")
+    monkeypatch.setattr(server, "_iter_children", lambda page_id, fresh=False: iter(old + [{"id": "tail", "type": "page"}]))
+    markdown = "first\n" + "\n".join(f"line {n}" for n in range(250))
+
+    result = asyncio.run(server.sync_page_from_markdown("page", markdown))
+
+    assert result.startswith("✅")
+    posts = [payload for method, payload in fake_api.calls if method == "POST"]
+    assert [len(payload["blocks"]) for payload in posts] == [100, 100, 50]
+    assert [payload["after"] for payload in posts] == ["old0", "n100", "n200"]
+
+
+def test_touched_blocks_leave_the_cache(fake_api, monkeypatch):
+    old = page("one\ntwo")
+    monkeypatch.setattr(server, "_iter_children", lambda page_id, fresh=False: iter(old))
+    monkeypatch.setenv("WOLAI_CACHE_TTL", "60")
+    server._cached(("block", "old1"), lambda: old[1])
+
+    asyncio.run(server.sync_page_from_markdown("page", "one\nTWO"))
+
+    assert [method for method, _ in fake_api.calls] == ["PATCH"]
+    assert ("block", "old1") not in server._cache
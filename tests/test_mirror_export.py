@@ -0,0 +1,164 @@
+import os
+
+import pytest
+
+from wolai_mcp import mirror, server
+from wolai_mcp.mirror import Mirror
+
+
+class Tree:
+    """An in-memory page tree served in place of the API."""
+
+    def __init__(self, pages: int = 30, blocks_per_page: int = 4):
+        self.blocks = {"root": self.block("root", "page", "Root")}
+        self.children = {"root": []}
+        self.listings = 0
+        self.fail_after = None
+        for n in range(pages):
+            parent = "root" if n < 3 else f"p{(n - 3) // 3}"
+            self.add(parent, f"p{n}", "page", f"Page {n}")
+            for m in range(blocks_per_page):
+                self.add(f"p{n}", f"p{n}b{m}", "text", f"Block {m} of page {n}")
+
+    @staticmethod
+    def block(block_id: str, block_type: str, text: str) -> dict:
+        return {"id": block_id, "type": block_type, "content": [{"title": text}], "edited_at": 1, "version": 1}
+
+    def add(self, parent: str, block_id: str, block_type: str, text: str):
+        self.blocks[block_id] = self.block(block_id, block_type, text)
+        self.children[block_id] = []
+        self.children[parent].append(block_id)
+
+    def fetch_block(self, block_id: str) -> dict:
+        return dict(self.blocks[block_id])
+
+    def iter_children(self, block_id: str):
+        if self.fail_after is not None and self.listings >= self.fail_after:
+            raise ConnectionError("interrupted")
+        self.listings += 1
+        return iter([dict(self.blocks[child]) for child in self.children[block_id]])
+
+
+@pytest.fixture
+def tree(monkeypatch):
+    # Small chunks so an interrupted export has flushed some of its records
+    monkeypatch.setattr(mirror, "CHUNK_RECORDS", 8)
+    built = Tree()
+    monkeypatch.setattr(server, "_fetch_block", built.fetch_block)
+    monkeypatch.setattr(server, "_iter_raw_children", built.iter_children)
+    return built
+
+
+def contents(path: str) -> dict:
+    """Latest block and children of every record, without snapshot bookkeeping."""
+    store = Mirror(path)
+    try:
+        return {
+            record["id"]: (record["block"], record.get("children"))
+            for record in store.records() if not record["id"].startswith("@")
+        }
+    finally:
+        store.close()
+
+
+def sizes(path: str) -> tuple:
+    return os.path.getsize(path), os.path.getsize(path + ".idx")
+
+
+def test_export_matches_tree(tree, tmp_path):
+    path = str(tmp_path / "kb.wmirror")
+    stats = server._export_mirror(path, "root")
+
+    assert stats["listed"] == 31
+    records = contents(path)
+    assert set(records) == set(tree.blocks)
+    assert records["p0"] == (tree.blocks["p0"], tree.children["p0"])
+    assert records["p0b0"][1] is None
+
+
+def test_interrupted_export_resumes_to_a_clean_copy(tree, tmp_path):
+    clean = str(tmp_path / "clean.wmirror")
+    server._export_mirror(clean, "root")
+
+    path = str(tmp_path / "kb.wmirror")
+    tree.listings, tree.fail_after = 0, 12
+    with pytest.raises(ConnectionError):
+        server._export_mirror(path, "root")
+    tree.fail_after = None
+
+    stats = server._export_mirror(path, "", resume=True)
+    assert stats["listed"] == 31 - 12
+    assert contents(path) == contents(clean)
+    with pytest.raises(ValueError):
+        server._export_mirror(path, "", resume=True)
+
+
+def test_no_change_delta_appends_almost_nothing(tree, tmp_path):
+    path = str(tmp_path / "kb.wmirror")
+    server._export_mirror(path, "root")
+    before_contents, before_sizes = contents(path), sizes(path)
+
+    stats = server._export_mirror(path, "", delta=True)
+
+    assert stats["written"] == 0 and stats["listed"] == 31
+    assert contents(path) == before_contents
+    grown = [after - before for after, before in zip(sizes(path), before_sizes)]
+    assert grown[0] < 300 and grown[1] < 200
+
+
+def test_delta_picks_up_changes(tree, tmp_path):
+    path = str(tmp_path / "kb.wmirror")
+    server._export_mirror(path, "root")
+    tree.blocks["p20b1"]["content"] = [{"title": "edited deep down"}]
+    tree.add("p25", "p25new", "text", "new block")
+
+    stats = server._export_mirror(path, "", delta=True)
+
+    assert stats["written"] == 3
+    records = contents(path)
+    assert records["p20b1"][0]["content"] == [{"title": "edited deep down"}]
+    assert records["p25"][1][-1] == "p25new" and "p25new" in records
+
+
+def test_interrupted_delta_resumes(tree, tmp_path):
+    path = str(tmp_path / "kb.wmirror")
+    server._export_mirror(path, "root")
+    tree.add("p28", "p28new", "text", "new block")
+    tree.listings, tree.fail_after = 0, 5
+    with pytest.raises(ConnectionError):
+        server._export_mirror(path, "", delta=True)
+    tree.fail_after = None
+
+    server._export_mirror(path, "", resume=True)
+    assert contents(path)["p28"][1][-1] == "p28new"
+
+
+def test_missing_index_is_rebuilt(tree, tmp_path):
+    path = str(tmp_path / "kb.wmirror")
+    server._export_mirror(path, "root")
+    expected = contents(path)
+    os.remove(path + ".idx")
+
+    assert contents(path) == expected
+    server._export_mirror(path, "", delta=True)
+    assert contents(path) == expected
+    assert os.path.exists(path + ".idx")
+
+
+def test_torn_last_chunk_is_dropped(tree, tmp_path):
+    path = str(tmp_path / "kb.wmirror")
+    server._export_mirror(path, "root")
+    expected, size = contents(path), os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\x1f\x8b\x08\x00partial")
+
+    Mirror(path, writable=True).close()
+    assert os.path.getsize(path) == size
+    assert contents(path) == expected
+
+
+def test_delta_without_a_snapshot_fails_cleanly(tree, tmp_path):
+    path = tmp_path / "empty.wmirror"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        server._export_mirror(str(path), "", delta=True)
@@ -0,0 +1,93 @@
+import asyncio
+import re
+
+import pytest
+
+from wolai_mcp import server
+
+# Children per upstream listing page, small so budgets cross page boundaries
+_LISTING_PAGE = 7
+_CURSOR_RE = re.compile(r'cursor="([^"]+)"\)$')
+
+
+def make_children(count: int) -> list:
+    children = []
+    for n in range(count):
+        block_type = ("text", "heading_2", "bulleted_list", "code")[n % 4]
+        # Every ninth block is empty and renders nothing
+        text = "" if n % 9 == 8 else f"line {n} " + "x" * (n * 7 % 40)
+        children.append({"id": f"c{n}", "type": block_type, "content": [{"title": text}]})
+    return children
+
+
+@pytest.fixture
+def fake_page(monkeypatch):
+    children = make_children(40)
+
+    def fetch_children_page(block_id, start_cursor, page_size):
+        start = int(start_cursor or 0)
+        end = start + min(page_size or server._MAX_PAGE_SIZE, _LISTING_PAGE)
+        return [dict(child) for child in children[start:end]], str(end) if end < len(children) else ""
+
+    monkeypatch.setattr(server, "_fetch_children_page", fetch_children_page)
+    monkeypatch.setattr(server, "_fetch_block", lambda block_id: {"id": block_id, "content": [{"title": "Big"}]})
+    monkeypatch.setattr(server, "_get_mirror", lambda: None)
+    return children
+
+
+def read(**kwargs) -> str:
+    return asyncio.run(server.get_page_content("page", **kwargs))
+
+
+def read_all(**budget) -> tuple[list, int]:
+    """Follows cursors until the page is done; returns (body parts, calls)."""
+    parts, calls, cursor = [], 0, ""
+    while True:
+        text = read(cursor=cursor, **budget)
+        calls += 1
+        assert not text.startswith("Error"), text
+        sections = text.split("\n\n")
+        match = _CURSOR_RE.search(sections[-1])
+        if match:
+            assert sections[-1].startswith("---\n⏭️")
+            sections = sections[:-1]
+        parts.extend(sections[1:])
+        if not match:
+            return parts, calls
+        cursor = match.group(1)
+
+
+def test_unbudgeted_read_returns_every_block(fake_page):
+    text = read()
+    assert "⏭️" not in text
+    rendered = [server._render_block(child) for child in fake_page]
+    assert text.split("\n\n")[1:] == [line for line in rendered if line]
+
+
+@pytest.mark.parametrize("budget", [
+    {"max_blocks": 1},
+    {"max_blocks": 3},
+    {"max_blocks": _LISTING_PAGE},
+    {"max_blocks": 10},
+    {"max_chars": 120},
+    {"max_chars": 400},
+    {"max_blocks": 4, "max_chars": 150},
+])
+def test_paged_reads_reproduce_the_full_page(fake_page, budget):
+    full = read().split("\n\n")[1:]
+    parts, calls = read_all(**budget)
+    assert parts == full
+    assert calls > 1
+
+
+def test_budget_is_respected(fake_page):
+    text = read(max_blocks=5)
+    assert len(text.split("\n\n")) == 1 + 5 + 1
+    text = read(max_chars=200)
+    body = text.rsplit("\n\n---", 1)[0]
+    assert len(body) <= 200
+
+
+def test_cursor_for_another_page_is_rejected(fake_page):
+    cursor = _CURSOR_RE.search(read(max_blocks=2)).group(1)
+    assert asyncio.run(server.get_page_content("other", cursor=cursor)).startswith("❌")